@@ -0,0 +1,162 @@
+"""Seeded SQLite stand-in for the Home Assistant recorder."""
+from __future__ import annotations
+
+from datetime import datetime
+import math
+import random
+import sqlite3
+import threading
+from typing import Any
+
+STATISTICS_PERIOD = 300  # seconds, matches the recorder's 5-minute statistics
+
+
+class SyntheticRecorder:
+    """Recorder with generated sensor history.
+
+    Provides the two recorder functions the integration uses,
+    get_significant_states and statistics_during_period, backed by an
+    SQLite database, and counts the rows each query reads.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """Initialize the database."""
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE states (entity_id TEXT, state TEXT, last_updated_ts REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX ix_states_entity_ts ON states (entity_id, last_updated_ts)"
+        )
+        self._lock = threading.Lock()
+        self.rows_scanned = 0
+        self.queries = 0
+
+    def seed(
+        self,
+        entity_ids: list[str],
+        end_ts: float,
+        hours: float,
+        interval: float,
+        seed: int = 0,
+    ) -> dict[str, float]:
+        """Generate a random walk per entity with a state every interval seconds.
+
+        Returns the last value per entity.
+        """
+        rng = random.Random(seed)
+        start_ts = end_ts - hours * 3600
+        steps = int(hours * 3600 / interval)
+        last_values = {}
+
+        for entity_id in entity_ids:
+            value = rng.uniform(0, 1000)
+            rows = []
+            for step in range(steps):
+                value = max(0.0, value + rng.gauss(0, 5))
+                rows.append((entity_id, f"{value:.2f}", start_ts + step * interval))
+            self._conn.executemany("INSERT INTO states VALUES (?, ?, ?)", rows)
+            last_values[entity_id] = round(value, 2)
+
+        self._conn.commit()
+        return last_values
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
+
+    def reset_counters(self) -> None:
+        """Reset the query counters."""
+        self.rows_scanned = 0
+        self.queries = 0
+
+    def get_significant_states(
+        self,
+        hass: Any,
+        start_time: datetime,
+        end_time: datetime | None = None,
+        entity_ids: list[str] | None = None,
+        filters: Any = None,
+        include_start_time_state: bool = True,
+        significant_changes_only: bool = True,
+        minimal_response: bool = False,
+        no_attributes: bool = False,
+        compressed_state_format: bool = False,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Return states in the compressed format of the recorder."""
+        start_ts = start_time.timestamp()
+        end_ts = end_time.timestamp() if end_time else math.inf
+        entity_ids = entity_ids or []
+        placeholders = ",".join("?" * len(entity_ids))
+        result: dict[str, list[dict[str, Any]]] = {}
+
+        with self._lock:
+            self.queries += 1
+            if include_start_time_state:
+                for entity_id, state in self._conn.execute(
+                    f"SELECT entity_id, state FROM states AS s WHERE entity_id IN ({placeholders}) "
+                    "AND last_updated_ts = (SELECT MAX(last_updated_ts) FROM states "
+                    "WHERE entity_id = s.entity_id AND last_updated_ts < ?)",
+                    (*entity_ids, start_ts),
+                ):
+                    self.rows_scanned += 1
+                    result[entity_id] = [{"s": state, "a": {}, "lu": start_ts}]
+
+            for entity_id, state, last_updated_ts in self._conn.execute(
+                f"SELECT entity_id, state, last_updated_ts FROM states "
+                f"WHERE entity_id IN ({placeholders}) "
+                "AND last_updated_ts >= ? AND last_updated_ts < ? "
+                "ORDER BY entity_id, last_updated_ts",
+                (*entity_ids, start_ts, end_ts),
+            ):
+                self.rows_scanned += 1
+                result.setdefault(entity_id, []).append(
+                    {"s": state, "lu": last_updated_ts}
+                )
+
+        return result
+
+    def statistics_during_period(
+        self,
+        hass: Any,
+        start_time: datetime,
+        end_time: datetime | None,
+        statistic_ids: set[str] | None,
+        period: str,
+        units: dict[str, str] | None,
+        types: set[str],
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Return 5-minute mean/min/max statistics.
+
+        The aggregation runs in SQLite; only the resulting rows count as
+        scanned, like reading the recorder's statistics table.
+        """
+        start_ts = start_time.timestamp()
+        end_ts = end_time.timestamp() if end_time else math.inf
+        statistic_ids = list(statistic_ids or [])
+        placeholders = ",".join("?" * len(statistic_ids))
+        result: dict[str, list[dict[str, Any]]] = {}
+
+        with self._lock:
+            self.queries += 1
+            for entity_id, start, mean, minimum, maximum in self._conn.execute(
+                f"SELECT entity_id, CAST(last_updated_ts / {STATISTICS_PERIOD} AS INTEGER) "
+                f"* {STATISTICS_PERIOD} AS start, AVG(CAST(state AS REAL)), "
+                "MIN(CAST(state AS REAL)), MAX(CAST(state AS REAL)) FROM states "
+                f"WHERE entity_id IN ({placeholders}) "
+                "AND last_updated_ts >= ? AND last_updated_ts < ? "
+                "GROUP BY entity_id, start ORDER BY entity_id, start",
+                (*statistic_ids, start_ts, end_ts),
+            ):
+                self.rows_scanned += 1
+                result.setdefault(entity_id, []).append(
+                    {
+                        "start": float(start),
+                        "end": float(start + STATISTICS_PERIOD),
+                        "mean": mean,
+                        "min": minimum,
+                        "max": maximum,
+                    }
+                )
+
+        return result
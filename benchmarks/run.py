@@ -0,0 +1,281 @@
+"""Offline benchmark of the TRMNL coordinator refresh.
+
+Runs TRMNLCoordinator._async_update_data against a seeded synthetic
+recorder and a local TRMNL stand-in server, and reports refresh latency,
+recorder rows scanned, peak allocations and bytes sent.
+
+Requires Home Assistant to be installed. Run from the repository root:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --entities 10 100 --interval 60 --statistics
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from homeassistant.components.recorder import history as recorder_history
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from custom_components.trmnl_webhook import coordinator as trmnl_coordinator
+from custom_components.trmnl_webhook import history as trmnl_history
+from custom_components.trmnl_webhook import hub as trmnl_hub
+from custom_components.trmnl_webhook import sender as trmnl_sender
+from custom_components.trmnl_webhook.const import (
+    CONF_ENTITIES,
+    CONF_HISTORY_POINTS,
+    CONF_STATISTICS_MODE,
+    CONF_WEBHOOK_ID,
+)
+
+from .recorder import SyntheticRecorder
+from .trmnl_server import TRMNLStandInServer
+
+DEFAULT_ENTITY_COUNTS = (10, 100, 500)
+
+
+@dataclass
+class RefreshResult:
+    """Measurements of one refresh."""
+
+    latency_ms: float
+    rows_scanned: int
+    queries: int
+    peak_alloc_kib: float
+    bytes_sent: int
+    failed: bool
+
+
+class _RecorderInstance:
+    """Stand-in for the recorder instance returned by get_instance."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.async_add_executor_job = hass.async_add_executor_job
+
+
+async def run_scenario(args: argparse.Namespace, entity_count: int) -> list[RefreshResult]:
+    """Seed a recorder, run the refreshes of one scenario and measure them."""
+    entity_ids = [f"sensor.bench_{index:04d}" for index in range(entity_count)]
+    db_path = ":memory:"
+    if args.db_dir:
+        db_path = os.path.join(args.db_dir, f"benchmark_{entity_count}.db")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+    recorder = SyntheticRecorder(db_path)
+    values = recorder.seed(
+        entity_ids,
+        dt_util.utcnow().timestamp(),
+        args.hours,
+        args.interval,
+        seed=args.seed,
+    )
+
+    server = TRMNLStandInServer(
+        latency=args.latency,
+        rate_limit_ratio=args.rate_limit_ratio,
+        error_ratio=args.error_ratio,
+        seed=args.seed,
+    )
+    await server.start()
+
+    results = []
+    with tempfile.TemporaryDirectory() as config_dir, ExitStack() as stack:
+        hass = HomeAssistant(config_dir)
+        for entity_id in entity_ids:
+            hass.states.async_set(
+                entity_id,
+                values[entity_id],
+                {
+                    "friendly_name": entity_id,
+                    "unit_of_measurement": "W",
+                    "device_class": "power",
+                    "state_class": "measurement",
+                },
+            )
+
+        stack.enter_context(
+            patch.object(
+                recorder_history,
+                "get_significant_states",
+                recorder.get_significant_states,
+            )
+        )
+        stack.enter_context(
+            patch.object(
+                trmnl_history,
+                "statistics_during_period",
+                recorder.statistics_during_period,
+            )
+        )
+        stack.enter_context(
+            patch.object(
+                trmnl_history, "get_instance", lambda hass: _RecorderInstance(hass)
+            )
+        )
+        stack.enter_context(
+            patch.object(trmnl_coordinator, "TRMNL_WEBHOOK_URL", server.url_template)
+        )
+        # Measure the refresh itself, not the spacing between sends
+        stack.enter_context(patch.object(trmnl_sender, "SEND_SPACING", 0))
+        # Refreshes run back to back, don't serve them from the hub's cache
+        stack.enter_context(patch.object(trmnl_hub, "HUB_TICK", 0))
+
+        entry = SimpleNamespace(
+            entry_id=f"benchmark_{entity_count}",
+            title=f"Benchmark {entity_count}",
+            data={
+                CONF_WEBHOOK_ID: "benchmark",
+                CONF_ENTITIES: entity_ids,
+                CONF_HISTORY_POINTS: args.history_points,
+                CONF_STATISTICS_MODE: args.statistics,
+            },
+        )
+        coordinator = trmnl_coordinator.TRMNLCoordinator(hass, entry)
+
+        for refresh in range(args.refreshes):
+            # Change every state so the payload is sent on every refresh
+            for entity_id in entity_ids:
+                hass.states.async_set(
+                    entity_id,
+                    round(values[entity_id] + refresh + 1, 2),
+                    hass.states.get(entity_id).attributes,
+                )
+
+            recorder.reset_counters()
+            bytes_before = server.stats.bytes_received
+            tracemalloc.start()
+            started = time.perf_counter()
+            failed = False
+            try:
+                await coordinator._async_update_data()  # noqa: SLF001
+            except UpdateFailed:
+                failed = True
+            latency = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append(
+                RefreshResult(
+                    latency_ms=round(latency * 1000, 2),
+                    rows_scanned=recorder.rows_scanned,
+                    queries=recorder.queries,
+                    peak_alloc_kib=round(peak / 1024, 1),
+                    bytes_sent=server.stats.bytes_received - bytes_before,
+                    failed=failed,
+                )
+            )
+
+        await hass.async_stop(force=True)
+
+    await server.stop()
+    recorder.close()
+    return results
+
+
+def print_report(report: dict[int, list[RefreshResult]]) -> None:
+    """Print a summary table: the first (cold) refresh and the warm ones."""
+    header = (
+        f"{'entities':>8} {'refresh':>7} {'latency ms':>11} {'rows':>9} "
+        f"{'queries':>7} {'peak KiB':>9} {'bytes sent':>10} {'failed':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for entity_count, results in report.items():
+        cold, warm = results[0], results[1:]
+        rows = [("cold", cold)]
+        if warm:
+            rows.append(
+                (
+                    "warm",
+                    RefreshResult(
+                        latency_ms=round(statistics.median(r.latency_ms for r in warm), 2),
+                        rows_scanned=round(statistics.median(r.rows_scanned for r in warm)),
+                        queries=round(statistics.median(r.queries for r in warm)),
+                        peak_alloc_kib=round(
+                            statistics.median(r.peak_alloc_kib for r in warm), 1
+                        ),
+                        bytes_sent=round(statistics.median(r.bytes_sent for r in warm)),
+                        failed=any(r.failed for r in warm),
+                    ),
+                )
+            )
+        for label, result in rows:
+            print(
+                f"{entity_count:>8} {label:>7} {result.latency_ms:>11} "
+                f"{result.rows_scanned:>9} {result.queries:>7} "
+                f"{result.peak_alloc_kib:>9} {result.bytes_sent:>10} "
+                f"{'yes' if result.failed else 'no':>6}"
+            )
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run all scenarios."""
+    report = {}
+    for entity_count in args.entities:
+        report[entity_count] = await run_scenario(args, entity_count)
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    str(entity_count): [asdict(result) for result in results]
+                    for entity_count, results in report.items()
+                },
+                indent=2,
+            )
+        )
+    else:
+        print_report(report)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--entities",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_ENTITY_COUNTS),
+        help="entity counts to benchmark (default: 10 100 500)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="seconds between state changes per entity (default: 1)",
+    )
+    parser.add_argument(
+        "--hours", type=float, default=24, help="hours of history to seed (default: 24)"
+    )
+    parser.add_argument(
+        "--refreshes", type=int, default=5, help="refreshes per scenario (default: 5)"
+    )
+    parser.add_argument("--history-points", type=int, default=0)
+    parser.add_argument("--statistics", action="store_true", help="enable statistics mode")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in seconds")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--error-ratio", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--db-dir",
+        help="directory for on-disk SQLite databases (default: in memory, "
+        "use a directory for large scenarios)",
+    )
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,92 @@
+"""Local stand-in for the TRMNL webhook API."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import random
+
+from aiohttp import web
+
+WEBHOOK_PATH = "/api/custom_plugins/{webhook_id}"
+
+
+@dataclass
+class ServerStats:
+    """Requests seen by the stand-in server."""
+
+    requests: int = 0
+    accepted: int = 0
+    rate_limited: int = 0
+    server_errors: int = 0
+    bytes_received: int = 0
+    payload_sizes: list[int] = field(default_factory=list)
+
+
+class TRMNLStandInServer:
+    """aiohttp server accepting TRMNL webhook posts.
+
+    Latency, 429 rate-limit responses and 5xx errors can be injected; the
+    random choices are seeded so runs are repeatable.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        error_ratio: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the server."""
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.error_ratio = error_ratio
+        self.retry_after = retry_after
+        self.stats = ServerStats()
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+
+    @property
+    def url_template(self) -> str:
+        """Return the webhook URL template pointing at this server."""
+        return f"http://127.0.0.1:{self.port}{WEBHOOK_PATH}"
+
+    async def start(self) -> None:
+        """Start listening on a free local port."""
+        app = web.Application()
+        app.router.add_post(WEBHOOK_PATH, self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """Handle a webhook post."""
+        body = await request.read()
+        self.stats.requests += 1
+        self.stats.bytes_received += len(body)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        roll = self._random.random()
+        if roll < self.rate_limit_ratio:
+            self.stats.rate_limited += 1
+            return web.Response(
+                status=429, headers={"Retry-After": str(self.retry_after)}
+            )
+        if roll < self.rate_limit_ratio + self.error_ratio:
+            self.stats.server_errors += 1
+            return web.Response(status=503)
+
+        self.stats.accepted += 1
+        self.stats.payload_sizes.append(len(body))
+        return web.json_response({"message": "ok"})
@@ -1,65 +1,170 @@
 """The TRMNL integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import timedelta
 
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers import config_validation as cv
+from homeassistant.const import ENTITY_MATCH_ALL, Platform
+from homeassistant.core import (
+    CoreState,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+from homeassistant.helpers.typing import ConfigType
 
 from .const import (
     DOMAIN,
     SERVICE_SEND_UPDATE,
+    STARTUP_STAGGER,
 )
-from .coordinator import TRMNLCoordinator
+from .coordinator import TRMNLCoordinator, async_remove_last_payload
+from .hub import async_get_hub
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.BUTTON]
+PLATFORMS: list[Platform] = [Platform.BUTTON, Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up TRMNL from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
 
-    coordinator = TRMNLCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+SEND_UPDATE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        **cv.ENTITY_SERVICE_FIELDS,
+    }
+)
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    # Setup platforms (button for manual refresh)
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the TRMNL integration."""
 
-    # Register service for manual updates
-    async def handle_send_update(call: ServiceCall) -> None:
+    async def handle_send_update(call: ServiceCall) -> ServiceResponse:
         """Handle the send_update service call."""
-        config_entry_id = call.data.get("config_entry_id")
+        coordinators = _async_get_target_coordinators(hass, call)
         
-        if config_entry_id and config_entry_id in hass.data[DOMAIN]:
-            coordinator = hass.data[DOMAIN][config_entry_id]
-            await coordinator.async_request_refresh()
-        else:
-            _LOGGER.error("Invalid config_entry_id: %s", config_entry_id)
+        # Entries already refreshing join that refresh instead of starting one
+        results = await asyncio.gather(
+            *(coordinator.async_send_update() for coordinator in coordinators.values())
+        )
+        
+        if not call.return_response:
+            return None
+        return {"results": dict(zip(coordinators, results))}
 
+    # Register service for manual updates
     hass.services.async_register(
         DOMAIN,
         SERVICE_SEND_UPDATE,
         handle_send_update,
-        schema=vol.Schema({
-            vol.Required("config_entry_id"): cv.string,
-        }),
+        schema=SEND_UPDATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
     )
 
     return True
 
 
+@callback
+def _async_get_target_coordinators(
+    hass: HomeAssistant, call: ServiceCall
+) -> dict[str, TRMNLCoordinator]:
+    """Return the coordinators of the webhooks a service call targets.
+
+    Webhooks are selected by config entry ID ("all" for every webhook), or
+    by entity, device or area target.
+    """
+    coordinators: dict[str, TRMNLCoordinator] = hass.data.get(DOMAIN, {})
+    entry_ids = set(call.data.get(ATTR_CONFIG_ENTRY_ID, []))
+    
+    if ENTITY_MATCH_ALL in entry_ids or call.data.get("entity_id") == ENTITY_MATCH_ALL:
+        return dict(coordinators)
+    
+    if unknown := entry_ids - coordinators.keys():
+        raise ServiceValidationError(
+            f"Invalid config_entry_id: {', '.join(sorted(unknown))}"
+        )
+    
+    # The webhooks of the targeted entities, devices and areas
+    selected = async_extract_referenced_entity_ids(hass, call)
+    entity_registry = er.async_get(hass)
+    for entity_id in selected.referenced | selected.indirectly_referenced:
+        if (entity := entity_registry.async_get(entity_id)) and entity.platform == DOMAIN:
+            entry_ids.add(entity.config_entry_id)
+    device_registry = dr.async_get(hass)
+    for device_id in selected.referenced_devices:
+        if device := device_registry.async_get(device_id):
+            entry_ids.update(device.config_entries)
+    
+    if not (targets := {
+        entry_id: coordinator
+        for entry_id, coordinator in coordinators.items()
+        if entry_id in entry_ids
+    }):
+        raise ServiceValidationError("No TRMNL webhook selected")
+    
+    return targets
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up TRMNL from a config entry."""
+    hass.data.setdefault(DOMAIN, {})
+
+    coordinator = TRMNLCoordinator(hass, entry)
+    
+    # Keep the entity metadata cache up to date
+    entry.async_on_unload(coordinator.metadata.async_start())
+    
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    
+    # Don't wait for the first refresh: it runs once Home Assistant has
+    # started, staggered across entries during boot
+    delay = 0
+    if hass.state is not CoreState.running:
+        entry_ids = [
+            other.entry_id for other in hass.config_entries.async_entries(DOMAIN)
+        ]
+        delay = entry_ids.index(entry.entry_id) * STARTUP_STAGGER
+    entry.async_on_unload(coordinator.async_start(delay))
+    
+    # Stop keeping shared history for this entry's entities on unload
+    entry.async_on_unload(
+        lambda: async_get_hub(hass).async_unregister(entry.entry_id)
+    )
+
+    # Setup platforms (button for manual refresh, diagnostics sensors)
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    return True
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted data of a config entry."""
+    await async_remove_last_payload(hass, entry.entry_id)
+    
+    # The history cache is shared by all entries
+    if not any(
+        other.entry_id != entry.entry_id
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        await async_get_hub(hass).async_remove()
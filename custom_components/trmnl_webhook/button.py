@@ -9,6 +9,7 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import TRMNLCoordinator
+from .entity import webhook_device_info
 
 
 async def async_setup_entry(
@@ -31,7 +32,8 @@ class TRMNLRefreshButton(CoordinatorEntity[TRMNLCoordinator], ButtonEntity):
         self._attr_name = f"{entry.title} Refresh"
         self._attr_unique_id = f"{entry.entry_id}_refresh"
         self._attr_icon = "mdi:refresh"
+        self._attr_device_info = webhook_device_info(entry)
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_send_update()
@@ -4,71 +4,267 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import callback
+from homeassistant.const import CONF_ENTITY_ID
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.selector import (
+    BooleanSelector,
     EntitySelector,
     EntitySelectorConfig,
     NumberSelector,
     NumberSelectorConfig,
     NumberSelectorMode,
+    ObjectSelector,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+    TextSelector,
+    TextSelectorConfig,
+    TimeSelector,
 )
 
 from .const import (
+    CONF_ALIGN_UPDATES,
+    CONF_COMPACT_FORMAT,
+    CONF_DOWNSAMPLE_METHOD,
     CONF_ENTITIES,
+    CONF_ENTITY_SETTINGS,
+    CONF_HISTORY_HOURS,
     CONF_HISTORY_POINTS,
+    CONF_LEAD_TIME,
+    CONF_MAX_STALENESS,
     CONF_NAME,
+    CONF_PRECISION,
+    CONF_PUSH_DEBOUNCE,
+    CONF_PUSH_MIN_INTERVAL,
+    CONF_PUSH_MODE,
+    CONF_PUSH_THRESHOLDS,
+    CONF_QUIET_END,
+    CONF_QUIET_START,
+    CONF_RECENT_DATA_WINDOW,
+    CONF_SHARD_WEBHOOK_IDS,
+    CONF_STATISTICS_MODE,
+    CONF_STATS,
     CONF_UPDATE_INTERVAL,
     CONF_WEBHOOK_ID,
+    DEFAULT_ALIGN_UPDATES,
+    DEFAULT_COMPACT_FORMAT,
+    DEFAULT_DOWNSAMPLE_METHOD,
     DEFAULT_HISTORY_POINTS,
+    DEFAULT_LEAD_TIME,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_PUSH_DEBOUNCE,
+    DEFAULT_PUSH_MIN_INTERVAL,
+    DEFAULT_PUSH_MODE,
+    DEFAULT_RECENT_DATA_WINDOW,
+    DEFAULT_STATISTICS_MODE,
+    DEFAULT_STATS,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    DOWNSAMPLE_METHODS,
+    HISTORY_HOURS,
+    MAX_HISTORY_HOURS,
     MAX_HISTORY_POINTS,
+    MAX_LEAD_TIME,
+    MAX_MAX_STALENESS,
+    MAX_PAYLOAD_SIZE,
+    MAX_PRECISION,
+    MAX_PUSH_DEBOUNCE,
+    MAX_PUSH_MIN_INTERVAL,
+    MAX_RECENT_DATA_WINDOW,
     MAX_UPDATE_INTERVAL,
+    MIN_HISTORY_HOURS,
     MIN_HISTORY_POINTS,
+    MIN_LEAD_TIME,
+    MIN_MAX_STALENESS,
+    MIN_PRECISION,
+    MIN_PUSH_DEBOUNCE,
+    MIN_PUSH_MIN_INTERVAL,
+    MIN_RECENT_DATA_WINDOW,
     MIN_UPDATE_INTERVAL,
+    STATS,
     TRMNL_WEBHOOK_URL,
 )
+from .estimate import PayloadEstimate, async_estimate_payload
+from .sender import async_get_sender
 
 _LOGGER = logging.getLogger(__name__)
 
+PUSH_THRESHOLDS_SCHEMA = vol.Schema(
+    {cv.entity_id: vol.All(vol.Coerce(float), vol.Range(min=0))}
+)
+
+
+def _validate_push_thresholds(
+    thresholds: Any, entity_ids: list[str]
+) -> dict[str, float] | None:
+    """Validate the push thresholds and drop those of unselected entities.
+
+    Returns None when they are not a mapping of entity IDs to non-negative
+    numbers.
+    """
+    try:
+        thresholds = PUSH_THRESHOLDS_SCHEMA(thresholds or {})
+    except vol.Invalid:
+        return None
+    return {
+        entity_id: threshold
+        for entity_id, threshold in thresholds.items()
+        if entity_id in entity_ids
+    }
+
+
+@callback
+def _has_duplicate_webhooks(
+    hass: HomeAssistant,
+    webhook_id: str,
+    shard_webhook_ids: list[str],
+    entry_id: str | None = None,
+) -> bool:
+    """Return True if a webhook would be used twice.
+
+    The shard webhooks must differ from each other, from the main webhook
+    and from every webhook of the other entries (entry_id is the entry
+    being edited). Main webhooks shared between entries are caught by the
+    unique ID.
+    """
+    webhook_ids = [webhook_id, *shard_webhook_ids]
+    if len(set(webhook_ids)) < len(webhook_ids):
+        return True
+    
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.entry_id == entry_id:
+            continue
+        other_shard_webhook_ids = set(entry.data.get(CONF_SHARD_WEBHOOK_IDS) or [])
+        if webhook_id in other_shard_webhook_ids or not (
+            other_shard_webhook_ids | {entry.data[CONF_WEBHOOK_ID]}
+        ).isdisjoint(shard_webhook_ids):
+            return True
+    return False
+
+
+def _lead_time_field(default: float) -> dict[vol.Optional, NumberSelector]:
+    """Return the lead time field, only shown when updates are aligned."""
+    return {
+        vol.Optional(CONF_LEAD_TIME, default=default): NumberSelector(
+            NumberSelectorConfig(
+                min=MIN_LEAD_TIME,
+                max=MAX_LEAD_TIME,
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="seconds",
+            )
+        ),
+    }
+
+
+def _needs_lead_time(user_input: dict[str, Any]) -> bool:
+    """Return True if aligned updates were enabled on a form without the lead time."""
+    return bool(user_input.get(CONF_ALIGN_UPDATES)) and CONF_LEAD_TIME not in user_input
+
+
+def _estimate_placeholders(estimate: PayloadEstimate) -> dict[str, str]:
+    """Return the description placeholders of a payload size estimate."""
+    return {
+        "size": str(estimate.size),
+        "fitted_size": str(estimate.fitted_size),
+        "max_size": str(MAX_PAYLOAD_SIZE),
+        "reductions": ", ".join(estimate.reductions),
+        "breakdown": estimate.breakdown(),
+    }
+
+
+async def _async_validate_webhook(hass: HomeAssistant, webhook_id: str) -> bool:
+    """Validate a webhook ID by testing the connection."""
+    url = TRMNL_WEBHOOK_URL.format(webhook_id=webhook_id)
+    
+    try:
+        # Send a test payload with merge_variables wrapper
+        test_payload = {
+            "merge_variables": {
+                "test": "true",
+                "message": "Home Assistant TRMNL integration test",
+            }
+        }
+        status = await async_get_sender(hass).async_post(url, test_payload)
+        # Accept both 200 and 201 as valid responses
+        return status in [200, 201]
+    except Exception as err:
+        _LOGGER.error("Error validating webhook: %s", err)
+        return False
+
 
 class TRMNLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for TRMNL."""
 
     VERSION = 1
 
+    _pending_input: dict[str, Any]
+    _estimate: PayloadEstimate
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.FlowResult:
         """Handle the initial step."""
         errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {}
 
-        if user_input is not None:
+        # Enabling aligned updates brings the form back with the lead time
+        if user_input is not None and not _needs_lead_time(user_input):
+            # The lead time only applies to aligned updates
+            if not user_input[CONF_ALIGN_UPDATES]:
+                user_input.pop(CONF_LEAD_TIME, None)
+            
+            # Dry-run the payload before anything is sent
+            estimate = async_estimate_payload(self.hass, user_input)
+            
             # Validate webhook ID
             webhook_id = user_input[CONF_WEBHOOK_ID]
             
-            if await self._validate_webhook(webhook_id):
+            # Push thresholds are kept for the selected entities only
+            thresholds = _validate_push_thresholds(
+                user_input.get(CONF_PUSH_THRESHOLDS), user_input[CONF_ENTITIES]
+            )
+            if thresholds is not None:
+                user_input[CONF_PUSH_THRESHOLDS] = thresholds
+            
+            if thresholds is None:
+                errors["base"] = "invalid_push_thresholds"
+            elif not estimate.fits:
+                errors["base"] = "payload_too_large"
+                placeholders = _estimate_placeholders(estimate)
+            elif _has_duplicate_webhooks(
+                self.hass, webhook_id, user_input.get(CONF_SHARD_WEBHOOK_IDS) or []
+            ):
+                errors["base"] = "duplicate_webhook"
+            elif await self._validate_webhook(webhook_id) and all(
+                [
+                    await self._validate_webhook(shard_webhook_id)
+                    for shard_webhook_id in user_input.get(CONF_SHARD_WEBHOOK_IDS) or []
+                ]
+            ):
                 # Create unique ID based on webhook ID
                 await self.async_set_unique_id(webhook_id)
                 self._abort_if_unique_id_configured()
                 
-                # Use custom name or fallback to webhook ID
-                title = user_input.get(CONF_NAME) or f"TRMNL Webhook {webhook_id[:8]}..."
+                # Let the user confirm a payload that has to be reduced
+                if estimate.reductions:
+                    self._pending_input = user_input
+                    self._estimate = estimate
+                    return await self.async_step_payload_size()
                 
-                return self.async_create_entry(
-                    title=title,
-                    data=user_input,
-                )
+                return self._async_create_webhook_entry(user_input)
             else:
                 errors["base"] = "cannot_connect"
 
         data_schema = vol.Schema({
             vol.Required(CONF_WEBHOOK_ID): str,
             vol.Optional(CONF_NAME): str,
+            vol.Optional(CONF_SHARD_WEBHOOK_IDS): TextSelector(
+                TextSelectorConfig(multiple=True)
+            ),
             vol.Required(CONF_ENTITIES): EntitySelector(
                 EntitySelectorConfig(
                     multiple=True,
@@ -85,6 +281,17 @@ class TRMNLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     unit_of_measurement="minutes",
                 )
             ),
+            vol.Optional(
+                CONF_ALIGN_UPDATES,
+                default=DEFAULT_ALIGN_UPDATES,
+            ): BooleanSelector(),
+            **(
+                _lead_time_field(DEFAULT_LEAD_TIME)
+                if user_input is not None and user_input[CONF_ALIGN_UPDATES]
+                else {}
+            ),
+            vol.Optional(CONF_QUIET_START): TimeSelector(),
+            vol.Optional(CONF_QUIET_END): TimeSelector(),
             vol.Optional(
                 CONF_HISTORY_POINTS,
                 default=DEFAULT_HISTORY_POINTS,
@@ -95,37 +302,116 @@ class TRMNLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     mode=NumberSelectorMode.BOX,
                 )
             ),
+            vol.Optional(
+                CONF_DOWNSAMPLE_METHOD,
+                default=DEFAULT_DOWNSAMPLE_METHOD,
+            ): SelectSelector(
+                SelectSelectorConfig(
+                    options=DOWNSAMPLE_METHODS,
+                    mode=SelectSelectorMode.DROPDOWN,
+                    translation_key=CONF_DOWNSAMPLE_METHOD,
+                )
+            ),
+            vol.Optional(
+                CONF_RECENT_DATA_WINDOW,
+                default=DEFAULT_RECENT_DATA_WINDOW,
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_RECENT_DATA_WINDOW,
+                    max=MAX_RECENT_DATA_WINDOW,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="hours",
+                )
+            ),
+            vol.Optional(
+                CONF_STATISTICS_MODE,
+                default=DEFAULT_STATISTICS_MODE,
+            ): BooleanSelector(),
+            vol.Optional(
+                CONF_COMPACT_FORMAT,
+                default=DEFAULT_COMPACT_FORMAT,
+            ): BooleanSelector(),
+            vol.Optional(
+                CONF_MAX_STALENESS,
+                default=DEFAULT_MAX_STALENESS,
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_MAX_STALENESS,
+                    max=MAX_MAX_STALENESS,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="minutes",
+                )
+            ),
+            vol.Optional(
+                CONF_PUSH_MODE,
+                default=DEFAULT_PUSH_MODE,
+            ): BooleanSelector(),
+            vol.Optional(
+                CONF_PUSH_DEBOUNCE,
+                default=DEFAULT_PUSH_DEBOUNCE,
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_PUSH_DEBOUNCE,
+                    max=MAX_PUSH_DEBOUNCE,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="seconds",
+                )
+            ),
+            vol.Optional(
+                CONF_PUSH_MIN_INTERVAL,
+                default=DEFAULT_PUSH_MIN_INTERVAL,
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_PUSH_MIN_INTERVAL,
+                    max=MAX_PUSH_MIN_INTERVAL,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="seconds",
+                )
+            ),
+            vol.Optional(CONF_PUSH_THRESHOLDS): ObjectSelector(),
         })
 
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
+
         return self.async_show_form(
             step_id="user",
             data_schema=data_schema,
             errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    async def async_step_payload_size(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Confirm a webhook whose payload has to be reduced to fit."""
+        if user_input is not None:
+            return self._async_create_webhook_entry(self._pending_input)
+
+        return self.async_show_form(
+            step_id="payload_size",
+            data_schema=vol.Schema({}),
+            description_placeholders=_estimate_placeholders(self._estimate),
+        )
+
+    @callback
+    def _async_create_webhook_entry(
+        self, user_input: dict[str, Any]
+    ) -> config_entries.FlowResult:
+        """Create the config entry of a webhook."""
+        webhook_id = user_input[CONF_WEBHOOK_ID]
+        
+        # Use custom name or fallback to webhook ID
+        title = user_input.get(CONF_NAME) or f"TRMNL Webhook {webhook_id[:8]}..."
+        
+        return self.async_create_entry(
+            title=title,
+            data=user_input,
         )
 
     async def _validate_webhook(self, webhook_id: str) -> bool:
         """Validate the webhook ID by testing the connection."""
-        url = TRMNL_WEBHOOK_URL.format(webhook_id=webhook_id)
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                # Send a test payload with merge_variables wrapper
-                test_payload = {
-                    "merge_variables": {
-                        "test": "true",
-                        "message": "Home Assistant TRMNL integration test",
-                    }
-                }
-                async with session.post(
-                    url,
-                    json=test_payload,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as response:
-                    # Accept both 200 and 201 as valid responses
-                    return response.status in [200, 201]
-        except Exception as err:
-            _LOGGER.error("Error validating webhook: %s", err)
-            return False
+        return await _async_validate_webhook(self.hass, webhook_id)
 
     @staticmethod
     @callback
@@ -139,35 +425,81 @@ class TRMNLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class TRMNLOptionsFlow(config_entries.OptionsFlow):
     """Handle options flow for TRMNL."""
 
+    _entity_id: str
+    _pending_input: dict[str, Any]
+    _estimate: PayloadEstimate
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Choose between the webhook settings and the per-entity settings."""
+        return self.async_show_menu(
+            step_id="init",
+            menu_options=["settings", "entity_settings"],
+        )
+
+    async def async_step_settings(
+        self, user_input: dict[str, Any] | None = None
     ) -> config_entries.FlowResult:
         """Manage the options."""
-        if user_input is not None:
-            # Prepare updated data
-            updated_data = dict(self.config_entry.data)
-            updated_data[CONF_ENTITIES] = user_input[CONF_ENTITIES]
-            updated_data[CONF_UPDATE_INTERVAL] = user_input[CONF_UPDATE_INTERVAL]
-            updated_data[CONF_HISTORY_POINTS] = user_input[CONF_HISTORY_POINTS]
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {}
+
+        # Enabling aligned updates brings the form back with the lead time
+        if user_input is not None and not _needs_lead_time(user_input):
+            # Dry-run the payload of the new settings
+            estimate = async_estimate_payload(self.hass, self._updated_data(user_input))
             
-            # Update name if provided
-            if user_input.get(CONF_NAME):
-                updated_data[CONF_NAME] = user_input[CONF_NAME]
-                new_title = user_input[CONF_NAME]
-            else:
-                new_title = self.config_entry.title
+            # The form shows the projected size, also when it comes back with an error
+            placeholders = _estimate_placeholders(estimate)
             
-            # Update the config entry
-            self.hass.config_entries.async_update_entry(
-                self.config_entry,
-                data=updated_data,
-                title=new_title,
+            # Validate the webhooks added for sharding
+            current_shard_webhook_ids = (
+                self.config_entry.data.get(CONF_SHARD_WEBHOOK_IDS) or []
             )
+            # Push thresholds are kept for the selected entities only
+            thresholds = _validate_push_thresholds(
+                user_input.get(CONF_PUSH_THRESHOLDS), user_input[CONF_ENTITIES]
+            )
+            if thresholds is not None:
+                user_input[CONF_PUSH_THRESHOLDS] = thresholds
             
-            # Reload to apply changes
-            await self.hass.config_entries.async_reload(self.config_entry.entry_id)
-            
-            return self.async_create_entry(title="", data={})
+            if thresholds is None:
+                errors["base"] = "invalid_push_thresholds"
+            elif not estimate.fits:
+                errors["base"] = "payload_too_large"
+            elif _has_duplicate_webhooks(
+                self.hass,
+                self.config_entry.data[CONF_WEBHOOK_ID],
+                user_input.get(CONF_SHARD_WEBHOOK_IDS) or [],
+                self.config_entry.entry_id,
+            ):
+                errors["base"] = "duplicate_webhook"
+            elif not all(
+                [
+                    await _async_validate_webhook(self.hass, shard_webhook_id)
+                    for shard_webhook_id in user_input.get(CONF_SHARD_WEBHOOK_IDS) or []
+                    if shard_webhook_id not in current_shard_webhook_ids
+                ]
+            ):
+                errors["base"] = "cannot_connect"
+            elif estimate.reductions:
+                # Let the user confirm a payload that has to be reduced
+                self._pending_input = user_input
+                self._estimate = estimate
+                return await self.async_step_payload_size()
+            else:
+                return await self._async_save_settings(user_input)
+        else:
+            # Show the projected size of the current or the new settings
+            placeholders = _estimate_placeholders(
+                async_estimate_payload(
+                    self.hass,
+                    self.config_entry.data
+                    if user_input is None
+                    else self._updated_data(user_input),
+                )
+            )
 
         # Get current values
         current_entities = self.config_entry.data.get(CONF_ENTITIES, [])
@@ -182,11 +514,58 @@ class TRMNLOptionsFlow(config_entries.OptionsFlow):
             CONF_HISTORY_POINTS, DEFAULT_HISTORY_POINTS
         )
         
+        current_downsample_method = self.config_entry.data.get(
+            CONF_DOWNSAMPLE_METHOD, DEFAULT_DOWNSAMPLE_METHOD
+        )
+        
+        current_recent_data_window = self.config_entry.data.get(
+            CONF_RECENT_DATA_WINDOW, DEFAULT_RECENT_DATA_WINDOW
+        )
+        
+        current_statistics_mode = self.config_entry.data.get(
+            CONF_STATISTICS_MODE, DEFAULT_STATISTICS_MODE
+        )
+        
+        current_compact_format = self.config_entry.data.get(
+            CONF_COMPACT_FORMAT, DEFAULT_COMPACT_FORMAT
+        )
+        
+        current_max_staleness = self.config_entry.data.get(
+            CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS
+        )
+        
+        current_push_mode = self.config_entry.data.get(CONF_PUSH_MODE, DEFAULT_PUSH_MODE)
+        
+        current_push_debounce = self.config_entry.data.get(
+            CONF_PUSH_DEBOUNCE, DEFAULT_PUSH_DEBOUNCE
+        )
+        
+        current_push_min_interval = self.config_entry.data.get(
+            CONF_PUSH_MIN_INTERVAL, DEFAULT_PUSH_MIN_INTERVAL
+        )
+        
+        current_push_thresholds = self.config_entry.data.get(CONF_PUSH_THRESHOLDS) or {}
+        
         current_name = self.config_entry.data.get(CONF_NAME, "")
+        
+        current_shard_webhook_ids = self.config_entry.data.get(CONF_SHARD_WEBHOOK_IDS) or []
+        
+        current_align_updates = self.config_entry.data.get(
+            CONF_ALIGN_UPDATES, DEFAULT_ALIGN_UPDATES
+        )
+        
+        current_lead_time = self.config_entry.data.get(CONF_LEAD_TIME, DEFAULT_LEAD_TIME)
+        
+        show_lead_time = (
+            current_align_updates if user_input is None else user_input[CONF_ALIGN_UPDATES]
+        )
 
         # Build the form schema
         data_schema = vol.Schema({
             vol.Optional(CONF_NAME, default=current_name): str,
+            vol.Optional(
+                CONF_SHARD_WEBHOOK_IDS, default=current_shard_webhook_ids
+            ): TextSelector(TextSelectorConfig(multiple=True)),
             vol.Required(CONF_ENTITIES, default=current_entities): EntitySelector(
                 EntitySelectorConfig(
                     multiple=True,
@@ -200,6 +579,16 @@ class TRMNLOptionsFlow(config_entries.OptionsFlow):
                     unit_of_measurement="minutes",
                 )
             ),
+            vol.Optional(CONF_ALIGN_UPDATES, default=current_align_updates): BooleanSelector(),
+            **(_lead_time_field(current_lead_time) if show_lead_time else {}),
+            vol.Optional(
+                CONF_QUIET_START,
+                description={"suggested_value": self.config_entry.data.get(CONF_QUIET_START)},
+            ): TimeSelector(),
+            vol.Optional(
+                CONF_QUIET_END,
+                description={"suggested_value": self.config_entry.data.get(CONF_QUIET_END)},
+            ): TimeSelector(),
             vol.Optional(CONF_HISTORY_POINTS, default=current_history_points): NumberSelector(
                 NumberSelectorConfig(
                     min=MIN_HISTORY_POINTS,
@@ -207,9 +596,256 @@ class TRMNLOptionsFlow(config_entries.OptionsFlow):
                     mode=NumberSelectorMode.BOX,
                 )
             ),
+            vol.Optional(CONF_DOWNSAMPLE_METHOD, default=current_downsample_method): SelectSelector(
+                SelectSelectorConfig(
+                    options=DOWNSAMPLE_METHODS,
+                    mode=SelectSelectorMode.DROPDOWN,
+                    translation_key=CONF_DOWNSAMPLE_METHOD,
+                )
+            ),
+            vol.Optional(CONF_RECENT_DATA_WINDOW, default=current_recent_data_window): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_RECENT_DATA_WINDOW,
+                    max=MAX_RECENT_DATA_WINDOW,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="hours",
+                )
+            ),
+            vol.Optional(CONF_STATISTICS_MODE, default=current_statistics_mode): BooleanSelector(),
+            vol.Optional(CONF_COMPACT_FORMAT, default=current_compact_format): BooleanSelector(),
+            vol.Optional(CONF_MAX_STALENESS, default=current_max_staleness): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_MAX_STALENESS,
+                    max=MAX_MAX_STALENESS,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="minutes",
+                )
+            ),
+            vol.Optional(CONF_PUSH_MODE, default=current_push_mode): BooleanSelector(),
+            vol.Optional(CONF_PUSH_DEBOUNCE, default=current_push_debounce): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_PUSH_DEBOUNCE,
+                    max=MAX_PUSH_DEBOUNCE,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="seconds",
+                )
+            ),
+            vol.Optional(CONF_PUSH_MIN_INTERVAL, default=current_push_min_interval): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_PUSH_MIN_INTERVAL,
+                    max=MAX_PUSH_MIN_INTERVAL,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="seconds",
+                )
+            ),
+            vol.Optional(CONF_PUSH_THRESHOLDS, default=current_push_thresholds): ObjectSelector(),
         })
 
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
+
         return self.async_show_form(
-            step_id="init",
+            step_id="settings",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    async def async_step_payload_size(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Confirm settings whose payload has to be reduced to fit."""
+        if user_input is not None:
+            return await self._async_save_settings(self._pending_input)
+
+        return self.async_show_form(
+            step_id="payload_size",
+            data_schema=vol.Schema({}),
+            description_placeholders=_estimate_placeholders(self._estimate),
+        )
+
+    def _updated_data(self, user_input: dict[str, Any]) -> dict[str, Any]:
+        """Return the config entry data with the new settings applied."""
+        # Prepare updated data
+        updated_data = dict(self.config_entry.data)
+        updated_data[CONF_ENTITIES] = user_input[CONF_ENTITIES]
+        updated_data[CONF_UPDATE_INTERVAL] = user_input[CONF_UPDATE_INTERVAL]
+        updated_data[CONF_HISTORY_POINTS] = user_input[CONF_HISTORY_POINTS]
+        updated_data[CONF_DOWNSAMPLE_METHOD] = user_input[CONF_DOWNSAMPLE_METHOD]
+        updated_data[CONF_RECENT_DATA_WINDOW] = user_input[CONF_RECENT_DATA_WINDOW]
+        updated_data[CONF_STATISTICS_MODE] = user_input[CONF_STATISTICS_MODE]
+        updated_data[CONF_COMPACT_FORMAT] = user_input[CONF_COMPACT_FORMAT]
+        updated_data[CONF_MAX_STALENESS] = user_input[CONF_MAX_STALENESS]
+        updated_data[CONF_PUSH_MODE] = user_input[CONF_PUSH_MODE]
+        updated_data[CONF_PUSH_DEBOUNCE] = user_input[CONF_PUSH_DEBOUNCE]
+        updated_data[CONF_PUSH_MIN_INTERVAL] = user_input[CONF_PUSH_MIN_INTERVAL]
+        updated_data[CONF_PUSH_THRESHOLDS] = user_input.get(CONF_PUSH_THRESHOLDS) or {}
+        updated_data[CONF_SHARD_WEBHOOK_IDS] = user_input.get(CONF_SHARD_WEBHOOK_IDS) or []
+        updated_data[CONF_ALIGN_UPDATES] = user_input[CONF_ALIGN_UPDATES]
+        # The lead time is only shown, and kept, when updates are aligned
+        if CONF_LEAD_TIME in user_input:
+            updated_data[CONF_LEAD_TIME] = user_input[CONF_LEAD_TIME]
+        updated_data[CONF_QUIET_START] = user_input.get(CONF_QUIET_START)
+        updated_data[CONF_QUIET_END] = user_input.get(CONF_QUIET_END)
+        
+        # Drop the settings of entities that are no longer sent
+        updated_data[CONF_ENTITY_SETTINGS] = {
+            entity_id: settings
+            for entity_id, settings in (
+                self.config_entry.data.get(CONF_ENTITY_SETTINGS) or {}
+            ).items()
+            if entity_id in user_input[CONF_ENTITIES]
+        }
+        
+        return updated_data
+
+    async def _async_save_settings(
+        self, user_input: dict[str, Any]
+    ) -> config_entries.FlowResult:
+        """Save the settings and reload the webhook."""
+        updated_data = self._updated_data(user_input)
+        
+        # Update name if provided
+        if user_input.get(CONF_NAME):
+            updated_data[CONF_NAME] = user_input[CONF_NAME]
+            new_title = user_input[CONF_NAME]
+        else:
+            new_title = self.config_entry.title
+        
+        # Update the config entry
+        self.hass.config_entries.async_update_entry(
+            self.config_entry,
+            data=updated_data,
+            title=new_title,
+        )
+        
+        # Reload to apply changes
+        await self.hass.config_entries.async_reload(self.config_entry.entry_id)
+        
+        return self.async_create_entry(title="", data={})
+
+    async def async_step_entity_settings(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Select the entity to configure."""
+        if user_input is not None:
+            self._entity_id = user_input[CONF_ENTITY_ID]
+            return await self.async_step_entity()
+
+        data_schema = vol.Schema({
+            vol.Required(CONF_ENTITY_ID): EntitySelector(
+                EntitySelectorConfig(
+                    include_entities=self.config_entry.data.get(CONF_ENTITIES, []),
+                )
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="entity_settings",
             data_schema=data_schema,
+        )
+
+    async def async_step_entity(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Manage the history settings of one entity."""
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {}
+        entity_settings = dict(self.config_entry.data.get(CONF_ENTITY_SETTINGS) or {})
+        history_points = self.config_entry.data.get(
+            CONF_HISTORY_POINTS, DEFAULT_HISTORY_POINTS
+        )
+
+        if user_input is not None:
+            settings = {
+                CONF_HISTORY_HOURS: int(user_input[CONF_HISTORY_HOURS]),
+                CONF_STATS: [stat for stat in STATS if stat in user_input[CONF_STATS]],
+                CONF_HISTORY_POINTS: int(user_input[CONF_HISTORY_POINTS]),
+            }
+            if user_input.get(CONF_PRECISION) is not None:
+                settings[CONF_PRECISION] = int(user_input[CONF_PRECISION])
+            
+            # Settings equal to the defaults need no override
+            if settings == {
+                CONF_HISTORY_HOURS: HISTORY_HOURS,
+                CONF_STATS: DEFAULT_STATS,
+                CONF_HISTORY_POINTS: int(history_points),
+            }:
+                entity_settings.pop(self._entity_id, None)
+            else:
+                entity_settings[self._entity_id] = settings
+            
+            updated_data = {**self.config_entry.data, CONF_ENTITY_SETTINGS: entity_settings}
+            
+            # Dry-run the payload of the new settings
+            estimate = async_estimate_payload(self.hass, updated_data)
+            if estimate.fits:
+                self.hass.config_entries.async_update_entry(
+                    self.config_entry,
+                    data=updated_data,
+                )
+                
+                # Reload to apply changes
+                await self.hass.config_entries.async_reload(self.config_entry.entry_id)
+                
+                return self.async_create_entry(title="", data={})
+            
+            errors["base"] = "payload_too_large"
+            placeholders = _estimate_placeholders(estimate)
+
+        current = entity_settings.get(self._entity_id, {})
+        
+        data_schema = vol.Schema({
+            vol.Optional(
+                CONF_HISTORY_HOURS,
+                default=current.get(CONF_HISTORY_HOURS, HISTORY_HOURS),
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_HISTORY_HOURS,
+                    max=MAX_HISTORY_HOURS,
+                    mode=NumberSelectorMode.BOX,
+                    unit_of_measurement="hours",
+                )
+            ),
+            vol.Optional(
+                CONF_STATS,
+                default=current.get(CONF_STATS, DEFAULT_STATS),
+            ): SelectSelector(
+                SelectSelectorConfig(
+                    options=STATS,
+                    multiple=True,
+                    mode=SelectSelectorMode.LIST,
+                    translation_key=CONF_STATS,
+                )
+            ),
+            vol.Optional(
+                CONF_HISTORY_POINTS,
+                default=current.get(CONF_HISTORY_POINTS, history_points),
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_HISTORY_POINTS,
+                    max=MAX_HISTORY_POINTS,
+                    mode=NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Optional(
+                CONF_PRECISION,
+                description={"suggested_value": current.get(CONF_PRECISION)},
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=MIN_PRECISION,
+                    max=MAX_PRECISION,
+                    mode=NumberSelectorMode.BOX,
+                )
+            ),
+        })
+
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
+
+        return self.async_show_form(
+            step_id="entity",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={"entity_id": self._entity_id, **placeholders},
         )
\ No newline at end of file
@@ -8,20 +8,107 @@ CONF_ENTITIES = "entities"
 CONF_UPDATE_INTERVAL = "update_interval"
 CONF_NAME = "name"
 CONF_HISTORY_POINTS = "history_points"
+CONF_STATISTICS_MODE = "statistics_mode"
+CONF_DOWNSAMPLE_METHOD = "downsample_method"
+CONF_RECENT_DATA_WINDOW = "recent_data_window"
+CONF_MAX_STALENESS = "max_staleness"
+CONF_PUSH_MODE = "push_mode"
+CONF_PUSH_DEBOUNCE = "push_debounce"
+CONF_PUSH_MIN_INTERVAL = "push_min_interval"
+CONF_PUSH_THRESHOLDS = "push_thresholds"
+CONF_COMPACT_FORMAT = "compact_format"
+CONF_ENTITY_SETTINGS = "entity_settings"
+CONF_SHARD_WEBHOOK_IDS = "shard_webhook_ids"
+CONF_ALIGN_UPDATES = "align_updates"
+CONF_LEAD_TIME = "lead_time"
+CONF_QUIET_START = "quiet_start"
+CONF_QUIET_END = "quiet_end"
+
+# Per-entity history settings
+CONF_HISTORY_HOURS = "history_hours"
+CONF_STATS = "stats"
+CONF_PRECISION = "precision"
+
+# Downsampling methods for recent data points
+DOWNSAMPLE_LAST = "last"
+DOWNSAMPLE_LTTB = "lttb"
+DOWNSAMPLE_MINMAX = "minmax"
+DOWNSAMPLE_MEAN = "mean"
+DOWNSAMPLE_METHODS = [
+    DOWNSAMPLE_LAST,
+    DOWNSAMPLE_LTTB,
+    DOWNSAMPLE_MINMAX,
+    DOWNSAMPLE_MEAN,
+]
+
+# Statistics an entity can send
+STAT_AVG = "avg"
+STAT_MIN = "min"
+STAT_MAX = "max"
+STAT_LAST = "last"
+STAT_DELTA = "delta"
+STAT_SUM = "sum"
+STAT_INTEGRAL = "integral"
+STAT_RATE = "rate"
+STAT_TODAY = "today"
+STATS = [
+    STAT_AVG,
+    STAT_MIN,
+    STAT_MAX,
+    STAT_LAST,
+    STAT_DELTA,
+    STAT_SUM,
+    STAT_INTEGRAL,
+    STAT_RATE,
+    STAT_TODAY,
+]
 
 # Defaults
 DEFAULT_UPDATE_INTERVAL = 60  # minutes
 DEFAULT_HISTORY_POINTS = 0
+DEFAULT_STATISTICS_MODE = False
+DEFAULT_DOWNSAMPLE_METHOD = DOWNSAMPLE_LAST
+DEFAULT_RECENT_DATA_WINDOW = 24  # hours
+DEFAULT_MAX_STALENESS = 0  # minutes, 0 = never resend unchanged data
+DEFAULT_PUSH_MODE = False
+DEFAULT_PUSH_DEBOUNCE = 30  # seconds
+DEFAULT_PUSH_MIN_INTERVAL = 300  # seconds, TRMNL allows ~12 webhook updates per hour
+DEFAULT_COMPACT_FORMAT = False
+DEFAULT_STATS = [STAT_AVG, STAT_MIN, STAT_MAX]
+DEFAULT_ALIGN_UPDATES = False
+DEFAULT_LEAD_TIME = 0  # seconds
 MIN_UPDATE_INTERVAL = 5  # minutes
 MAX_UPDATE_INTERVAL = 1440  # 24 hours in minutes
 MIN_HISTORY_POINTS = 0
 MAX_HISTORY_POINTS = 25
+MIN_RECENT_DATA_WINDOW = 1  # hours
+MAX_RECENT_DATA_WINDOW = 24  # hours
+MIN_MAX_STALENESS = 0  # minutes
+MAX_MAX_STALENESS = 1440  # 24 hours in minutes
+MIN_PUSH_DEBOUNCE = 0  # seconds
+MAX_PUSH_DEBOUNCE = 3600  # seconds
+MIN_PUSH_MIN_INTERVAL = 0  # seconds
+MAX_PUSH_MIN_INTERVAL = 86400  # seconds
+MIN_HISTORY_HOURS = 1  # hours
+MAX_HISTORY_HOURS = 24  # hours
+MIN_PRECISION = 0  # decimals
+MAX_PRECISION = 4  # decimals
+MIN_LEAD_TIME = 0  # seconds
+MAX_LEAD_TIME = 600  # seconds
 
 # TRMNL API
 TRMNL_WEBHOOK_URL = "https://usetrmnl.com/api/custom_plugins/{webhook_id}"
+MAX_PAYLOAD_SIZE = 2048  # bytes
+
+# Seconds between the first refreshes of the entries after startup
+STARTUP_STAGGER = 5
+
+# Largest per-entry offset of aligned updates, so entries don't send at once
+MAX_SCHEDULE_JITTER = 30  # seconds
 
 # History
-HISTORY_HOURS = 24
+HISTORY_HOURS = 24  # default window, can be shortened per entity
+MAX_STATE_SHARES = 3  # states with a time share for non-numeric entities
 
 # Service names
 SERVICE_SEND_UPDATE = "send_update"
\ No newline at end of file
@@ -2,33 +2,279 @@
 from __future__ import annotations
 
 import asyncio
-import json
+from collections import deque
+from collections.abc import Callable, Iterable
 from datetime import datetime, timedelta
+from functools import partial
 import logging
+import time
 from typing import Any
 
-import aiohttp
-
-from homeassistant.components.recorder import get_instance, history
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import (
+    EventStateChangedData,
+    async_call_later,
+    async_track_point_in_utc_time,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 
 from .const import (
+    CONF_ALIGN_UPDATES,
+    CONF_COMPACT_FORMAT,
+    CONF_DOWNSAMPLE_METHOD,
     CONF_ENTITIES,
+    CONF_ENTITY_SETTINGS,
     CONF_HISTORY_POINTS,
+    CONF_LEAD_TIME,
+    CONF_MAX_STALENESS,
+    CONF_PUSH_DEBOUNCE,
+    CONF_PUSH_MIN_INTERVAL,
+    CONF_PUSH_MODE,
+    CONF_PUSH_THRESHOLDS,
+    CONF_QUIET_END,
+    CONF_QUIET_START,
+    CONF_RECENT_DATA_WINDOW,
+    CONF_SHARD_WEBHOOK_IDS,
+    CONF_STATISTICS_MODE,
     CONF_UPDATE_INTERVAL,
     CONF_WEBHOOK_ID,
+    DEFAULT_ALIGN_UPDATES,
+    DEFAULT_COMPACT_FORMAT,
+    DEFAULT_DOWNSAMPLE_METHOD,
     DEFAULT_HISTORY_POINTS,
+    DEFAULT_LEAD_TIME,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_PUSH_DEBOUNCE,
+    DEFAULT_PUSH_MIN_INTERVAL,
+    DEFAULT_PUSH_MODE,
+    DEFAULT_RECENT_DATA_WINDOW,
+    DEFAULT_STATISTICS_MODE,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
-    HISTORY_HOURS,
+    DOWNSAMPLE_LAST,
+    MAX_PAYLOAD_SIZE,
+    MAX_STATE_SHARES,
     TRMNL_WEBHOOK_URL,
 )
+from .downsample import downsample
+from .entity_settings import EntitySettings, build_entity_settings
+from .history import (
+    STAT_ATTRIBUTES,
+    STATISTICS_PERIOD,
+    HistoryAggregator,
+    StateDurationAggregator,
+    samples_since,
+)
+from .hub import async_get_hub
+from .metadata import EntityMetadata, EntityMetadataCache
+from .metrics import (
+    PHASE_COLLECTION,
+    PHASE_HISTORY,
+    PHASE_HTTP,
+    PHASE_SERIALIZATION,
+    RefreshMetrics,
+)
+from .payload import (
+    COMPACT_REDUCTIONS,
+    DEFAULT_DECIMALS,
+    REDUCTIONS,
+    STAT_PAYLOAD_KEYS,
+    PayloadSerializer,
+    compact_entity,
+    fit_payload,
+    payload_size,
+    shard_payload,
+    state_decimals,
+    trim_number,
+)
+from .schedule import entry_jitter, in_quiet_hours, next_refresh
+from .sender import STATE_OPEN, CircuitBreaker, async_get_sender
 
 _LOGGER = logging.getLogger(__name__)
 
+# Last delivered payload per entry, restored on startup
+LAST_PAYLOAD_STORAGE_VERSION = 1
+LAST_PAYLOAD_SAVE_DELAY = 10  # seconds
+
+
+def _last_payload_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store of the last delivered payload of an entry."""
+    return Store(
+        hass, LAST_PAYLOAD_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.last_payload"
+    )
+
+
+async def async_remove_last_payload(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the persisted last payload of an entry."""
+    await _last_payload_store(hass, entry_id).async_remove()
+
+
+def build_payload(
+    entity_data: list[dict[str, Any]],
+    entity_settings: dict[str, EntitySettings],
+    compact_format: bool,
+    cache: dict[str, tuple[tuple[Any, ...], dict[str, Any], int]] | None = None,
+) -> dict[str, Any]:
+    """Build the TRMNL payload from the collected entity data.
+
+    cache maps entity IDs to the raw values, the object and the bytes the
+    compact format saved of the previous build; an entity whose state and
+    statistics did not change reuses its object instead of building it
+    again.
+    """
+    # Group entities by domain
+    grouped_entities = {}
+    now_ts = dt_util.utcnow().timestamp()
+    
+    # Add each entity to appropriate group
+    for entity in entity_data:
+        metadata: EntityMetadata = entity["metadata"]
+        settings = entity_settings[entity["entity_id"]]
+        aggregate = entity.get("history")
+        
+        # The raw values the entity object is built from
+        shares: list[tuple[str, int]] = []
+        history_inputs: tuple[Any, ...] = ()
+        if isinstance(aggregate, StateDurationAggregator):
+            shares = [
+                (state, round(share * 100))
+                for state, share in aggregate.shares(now_ts, MAX_STATE_SHARES)
+            ]
+            history_inputs = (
+                tuple(shares),
+                aggregate.transitions,
+                tuple(aggregate.last_changed_to.get(state) for state, _ in shares),
+            )
+        elif aggregate:
+            history_inputs = (
+                tuple(getattr(aggregate, STAT_ATTRIBUTES[stat]) for stat in settings.stats),
+                tuple(aggregate.recent),
+            )
+        key = (entity.get("last_updated"), entity["state"], metadata, history_inputs)
+        
+        cached = cache.get(entity["entity_id"]) if cache is not None else None
+        if cached is not None and cached[0] == key:
+            entity_obj = cached[1]
+        else:
+            entity_obj, compact_saved = _build_entity(
+                entity, settings, compact_format, shares
+            )
+            if cache is not None:
+                cache[entity["entity_id"]] = (key, entity_obj, compact_saved)
+        
+        # Auto-group by domain (pluralized)
+        if metadata.group_name not in grouped_entities:
+            grouped_entities[metadata.group_name] = []
+        
+        grouped_entities[metadata.group_name].append(entity_obj)
+    
+    # Build merge_variables
+    merge_variables = {
+        "last_update": dt_util.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **grouped_entities
+    }
+    
+    # Prepare payload
+    return {
+        "merge_variables": merge_variables
+    }
+
+
+def _build_entity(
+    entity: dict[str, Any],
+    settings: EntitySettings,
+    compact_format: bool,
+    shares: list[tuple[str, int]],
+) -> tuple[dict[str, Any], int]:
+    """Build the payload object of an entity.
+
+    shares holds the rounded time share per state of non-numeric entities.
+    Returns the object and the bytes the compact format saved on it.
+    """
+    metadata: EntityMetadata = entity["metadata"]
+    
+    # Compact numbers keep the decimals of the entity's state,
+    # unless the entity has its own precision
+    number: Callable[[float], str | float | int]
+    if compact_format:
+        number = partial(
+            trim_number,
+            decimals=state_decimals(entity["state"])
+            if settings.precision is None
+            else settings.precision,
+        )
+    else:
+        decimals = (
+            DEFAULT_DECIMALS if settings.precision is None else settings.precision
+        )
+        number = f"{{:.{decimals}f}}".format
+    
+    # Create entity object
+    entity_obj = {
+        "entity_id": metadata.payload_id,
+        "name": metadata.name,
+        "current": str(entity["state"]),
+        "last_changed": entity["last_changed"],
+    }
+    
+    # Add icon if available
+    if metadata.icon:
+        entity_obj["icon"] = metadata.icon
+    
+    # Add device_class if available
+    if metadata.device_class:
+        entity_obj["device_class"] = metadata.device_class
+    
+    # Add unit if available
+    if metadata.unit:
+        entity_obj["unit"] = metadata.unit
+    
+    aggregate = entity.get("history")
+    
+    # Add 24h time share per state for non-numeric entities
+    if isinstance(aggregate, StateDurationAggregator):
+        entity_obj["24h_states"] = dict(shares)
+        entity_obj["24h_changes"] = aggregate.transitions
+        
+        # When each state was last changed to within the window
+        if last_changed_to := {
+            state: dt_util.utc_from_timestamp(
+                aggregate.last_changed_to[state]
+            ).strftime("%H:%M")
+            for state, _ in shares
+            if state in aggregate.last_changed_to
+        }:
+            entity_obj["24h_last"] = last_changed_to
+    
+    # Add the entity's statistics and optionally recent data points
+    elif aggregate:
+        for stat in settings.stats:
+            entity_obj[STAT_PAYLOAD_KEYS[stat]] = number(
+                getattr(aggregate, STAT_ATTRIBUTES[stat])
+            )
+        
+        # Add recent data points if requested
+        if aggregate.recent:
+            entity_obj["recent_data"] = [
+                {
+                    "time": dt_util.utc_from_timestamp(timestamp).strftime("%H:%M"),
+                    "value": number(value)
+                }
+                for timestamp, value in aggregate.recent
+            ]
+    
+    if not compact_format:
+        return entity_obj, 0
+    
+    # Short keys and columnar recent data
+    compact = compact_entity(entity_obj)
+    return compact, payload_size(entity_obj) - payload_size(compact)
+
 
 class TRMNLCoordinator(DataUpdateCoordinator):
     """Class to manage fetching TRMNL data."""
@@ -37,228 +283,672 @@ class TRMNLCoordinator(DataUpdateCoordinator):
         """Initialize."""
         self.entry = entry
         self.webhook_id = entry.data[CONF_WEBHOOK_ID]
+        # Sharding: every webhook shows one page of the entities
+        self.webhook_ids = [
+            self.webhook_id, *(entry.data.get(CONF_SHARD_WEBHOOK_IDS) or [])
+        ]
         self.entities = entry.data[CONF_ENTITIES]
         self.history_points = int(entry.data.get(CONF_HISTORY_POINTS, DEFAULT_HISTORY_POINTS))
+        self.statistics_mode = entry.data.get(CONF_STATISTICS_MODE, DEFAULT_STATISTICS_MODE)
+        self.compact_format = entry.data.get(CONF_COMPACT_FORMAT, DEFAULT_COMPACT_FORMAT)
+        self.downsample_method = entry.data.get(CONF_DOWNSAMPLE_METHOD, DEFAULT_DOWNSAMPLE_METHOD)
+        self.recent_data_window = timedelta(
+            hours=int(entry.data.get(CONF_RECENT_DATA_WINDOW, DEFAULT_RECENT_DATA_WINDOW))
+        )
+        self.max_staleness = timedelta(
+            minutes=int(entry.data.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS))
+        )
+        
+        # History window, statistics, points and precision per entity
+        self.entity_settings = build_entity_settings(
+            self.entities, entry.data.get(CONF_ENTITY_SETTINGS), self.history_points
+        )
+        
+        # Change detection of the delivered payload, per webhook
+        self._last_sent_hashes: dict[str, str] = {}
+        self._last_sent_time: datetime | None = None
+        self.last_payloads: dict[str, dict[str, Any]] = {}
+        self._last_payload_store = _last_payload_store(hass, entry.entry_id)
+        
+        # Page of every entity when sharding, kept stable between updates
+        self._shard_assignment: dict[str, int] = {}
+        
+        # JSON fragments of the entities, serialized again only when changed.
+        # Reduced pages have their own cache, so they don't evict the full
+        # entities the next refresh starts from.
+        self._serializer = PayloadSerializer()
+        self._fitted_serializer = PayloadSerializer()
+        
+        # Entity objects of the last build with the values they were built
+        # from, reused while an entity's state and statistics are unchanged
+        self._entity_objects: dict[
+            str, tuple[tuple[Any, ...], dict[str, Any], int]
+        ] = {}
+        
+        self.metrics = RefreshMetrics()
+        
+        # Push mode: send on state changes, coalesced and rate limited
+        self.push_mode = entry.data.get(CONF_PUSH_MODE, DEFAULT_PUSH_MODE)
+        self.push_debounce = float(entry.data.get(CONF_PUSH_DEBOUNCE, DEFAULT_PUSH_DEBOUNCE))
+        self.push_min_interval = float(
+            entry.data.get(CONF_PUSH_MIN_INTERVAL, DEFAULT_PUSH_MIN_INTERVAL)
+        )
+        self.push_thresholds: dict[str, float] = {
+            entity_id: float(threshold)
+            for entity_id, threshold in (entry.data.get(CONF_PUSH_THRESHOLDS) or {}).items()
+        }
+        self._push_values: dict[str, float] = {}
+        self._last_push_time: datetime | None = None
+        self._unsub_push_timer: CALLBACK_TYPE | None = None
+        self._unsub_push: CALLBACK_TYPE | None = None
         
         update_interval_minutes = entry.data.get(
             CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
         )
-        update_interval = timedelta(minutes=update_interval_minutes)
+        self.refresh_interval = timedelta(minutes=update_interval_minutes)
+        
+        # Scheduling: wall-clock aligned ticks ahead of the device refresh,
+        # and quiet hours without any refreshes
+        self.align_updates = entry.data.get(CONF_ALIGN_UPDATES, DEFAULT_ALIGN_UPDATES)
+        self.lead_time = timedelta(
+            seconds=float(entry.data.get(CONF_LEAD_TIME, DEFAULT_LEAD_TIME))
+        )
+        self.jitter = entry_jitter(entry.entry_id) if self.align_updates else timedelta(0)
+        self.quiet_start = (
+            dt_util.parse_time(entry.data[CONF_QUIET_START])
+            if entry.data.get(CONF_QUIET_START)
+            else None
+        )
+        self.quiet_end = (
+            dt_util.parse_time(entry.data[CONF_QUIET_END])
+            if entry.data.get(CONF_QUIET_END)
+            else None
+        )
+        self._unsub_refresh_timer: CALLBACK_TYPE | None = None
+        # Set on unload, so a refresh in flight does not schedule another
+        self._stopped = False
+        
+        # Refresh in flight, shared by every caller that asks for an update
+        self._send_task: asyncio.Task[dict[str, Any]] | None = None
+        
+        self.metadata = EntityMetadataCache(hass, self.entities)
+        self._sender = async_get_sender(hass)
+        self.breaker = CircuitBreaker()
+        
+        self._hub = async_get_hub(hass)
 
+        # Refreshes are scheduled by async_start instead of an update interval
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}_{self.webhook_id}",
-            update_interval=update_interval,
+            update_interval=None,
+        )
+
+    @callback
+    def async_start(self, delay: float) -> CALLBACK_TYPE:
+        """Schedule the first refresh after Home Assistant has started.
+
+        Setup does not wait for the recorder or TRMNL; the first refresh
+        runs delay seconds after startup so entries do not all start at once.
+        The scheduled refreshes and, in push mode, the pushes on state
+        changes follow from there.
+        """
+        unsub_timer: CALLBACK_TYPE | None = None
+        
+        @callback
+        def _async_started(hass: HomeAssistant) -> None:
+            nonlocal unsub_timer
+            unsub_timer = async_call_later(hass, delay, self._async_first_refresh)
+        
+        unsub_started = async_at_started(self.hass, _async_started)
+        
+        @callback
+        def unsub() -> None:
+            self._stopped = True
+            unsub_started()
+            if unsub_timer:
+                unsub_timer()
+            if self._unsub_refresh_timer:
+                self._unsub_refresh_timer()
+                self._unsub_refresh_timer = None
+            if self._unsub_push:
+                self._unsub_push()
+                self._unsub_push = None
+        
+        return unsub
+
+    async def _async_first_refresh(self, _now: datetime) -> None:
+        """Restore the last delivered payload and run the first refresh."""
+        try:
+            await self.async_restore_last_payload()
+        except Exception as err:
+            # A broken store only costs one unneeded send
+            _LOGGER.warning(
+                "Could not restore the last payload of TRMNL webhook %s: %s",
+                self.webhook_id,
+                err,
+            )
+            self.last_payloads = {}
+            self._last_sent_hashes = {}
+            self._shard_assignment = {}
+        try:
+            if not self._stopped and not self.is_quiet(dt_util.utcnow()):
+                await self.async_send_update()
+        finally:
+            # Pushes compare against the restored payload, and the state
+            # restores during boot must not trigger one
+            if self.push_mode and not self._stopped:
+                self._unsub_push = self.async_start_push()
+            self._async_schedule_next_refresh()
+
+    def is_quiet(self, now: datetime) -> bool:
+        """Return True during the quiet hours."""
+        return in_quiet_hours(
+            dt_util.as_local(now).time(), self.quiet_start, self.quiet_end
+        )
+
+    @callback
+    def _async_schedule_next_refresh(self) -> None:
+        """Schedule the next refresh, unless the entry was unloaded."""
+        if self._stopped:
+            return
+        
+        when = next_refresh(
+            dt_util.utcnow(),
+            self.refresh_interval,
+            aligned=self.align_updates,
+            lead_time=self.lead_time,
+            jitter=self.jitter,
+            quiet_start=self.quiet_start,
+            quiet_end=self.quiet_end,
+        )
+        _LOGGER.debug("Next refresh of TRMNL webhook %s at %s", self.webhook_id, when)
+        self._unsub_refresh_timer = async_track_point_in_utc_time(
+            self.hass, self._async_scheduled_refresh, dt_util.as_utc(when)
+        )
+
+    async def _async_scheduled_refresh(self, _now: datetime) -> None:
+        """Run a scheduled refresh and schedule the next one."""
+        self._unsub_refresh_timer = None
+        try:
+            if not self.is_quiet(dt_util.utcnow()):
+                await self.async_send_update()
+        finally:
+            self._async_schedule_next_refresh()
+
+    async def async_send_update(self) -> dict[str, Any]:
+        """Refresh and send now, or join the refresh that is in flight.
+
+        Returns the result of the refresh: status, payload size in bytes,
+        duration in milliseconds, whether the send was skipped and the
+        error when it failed.
+        """
+        if self._send_task is None or self._send_task.done():
+            self._send_task = self.hass.async_create_task(self._async_send_update())
+        # A cancelled caller must not cancel the refresh of the others
+        return await asyncio.shield(self._send_task)
+
+    async def _async_send_update(self) -> dict[str, Any]:
+        """Refresh and return the result."""
+        started = time.monotonic()
+        await self.async_refresh()
+        
+        data = self.data or {}
+        return {
+            "status": data.get("status") if self.last_update_success else "failed",
+            "payload_size": data.get("payload_size"),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            "skipped": self.last_update_success and data.get("status") == "unchanged",
+            "error": None if self.last_update_success else str(self.last_exception),
+        }
+
+    async def async_restore_last_payload(self) -> None:
+        """Restore the last delivered payload from storage.
+
+        The first refresh then skips the send when TRMNL already shows the
+        same data, and the last result is available until it has run.
+        """
+        if (stored := await self._last_payload_store.async_load()) is None:
+            return
+        
+        # Only restore the pages of webhooks that are still configured
+        pages = {
+            webhook_id: page
+            for webhook_id, page in stored["pages"].items()
+            if webhook_id in self.webhook_ids
+        }
+        if not pages:
+            return
+        
+        self.last_payloads = {
+            webhook_id: page["payload"] for webhook_id, page in pages.items()
+        }
+        self._last_sent_hashes = {
+            webhook_id: page["hash"] for webhook_id, page in pages.items()
+        }
+        self._shard_assignment = stored["assignment"]
+        if stored["sent_at"]:
+            self._last_sent_time = dt_util.parse_datetime(stored["sent_at"])
+        if self.data is None:
+            self.data = {
+                "last_update": self._last_sent_time,
+                "entity_count": len(self.entities),
+                "payload_size": max(
+                    payload_size(payload) for payload in self.last_payloads.values()
+                ),
+                "pages": len(self.webhook_ids),
+                "reductions": [],
+                "status": "restored",
+            }
+
+    def _last_payload_to_save(self) -> dict[str, Any]:
+        """Return the last delivered payloads to persist."""
+        return {
+            "pages": {
+                webhook_id: {
+                    "payload": payload,
+                    "hash": self._last_sent_hashes[webhook_id],
+                }
+                for webhook_id, payload in self.last_payloads.items()
+            },
+            "assignment": self._shard_assignment,
+            "sent_at": self._last_sent_time.isoformat() if self._last_sent_time else None,
+        }
+
+    @callback
+    def async_start_push(self) -> CALLBACK_TYPE:
+        """Start sending updates when the configured entities change."""
+        unsub_state = async_track_state_change_event(
+            self.hass, self.entities, self._async_state_changed
         )
+        
+        @callback
+        def unsub() -> None:
+            unsub_state()
+            if self._unsub_push_timer:
+                self._unsub_push_timer()
+                self._unsub_push_timer = None
+        
+        return unsub
+
+    @callback
+    def _async_state_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Schedule a push for a significant state change."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data["new_state"]
+        if new_state is None or not self._is_significant(entity_id, new_state.state):
+            return
+        
+        # Nothing is sent while the display sleeps
+        if self.is_quiet(dt_util.utcnow()):
+            return
+        
+        # A push is already pending, it will include this change
+        if self._unsub_push_timer is not None:
+            return
+        
+        # Wait for the burst to settle, and keep the minimum spacing between sends
+        delay = self.push_debounce
+        if self._last_push_time is not None:
+            next_allowed = self._last_push_time + timedelta(seconds=self.push_min_interval)
+            delay = max(delay, (next_allowed - dt_util.utcnow()).total_seconds())
+        
+        self._unsub_push_timer = async_call_later(self.hass, delay, self._async_push)
+
+    def _is_significant(self, entity_id: str, state: str) -> bool:
+        """Return True if a state differs enough from the last pushed value."""
+        if (threshold := self.push_thresholds.get(entity_id)) is None:
+            return True
+        if (pushed := self._push_values.get(entity_id)) is None:
+            return True
+        try:
+            return abs(float(state) - pushed) >= threshold
+        except ValueError:
+            return True
+
+    async def _async_push(self, _now: datetime) -> None:
+        """Send a coalesced push update."""
+        self._unsub_push_timer = None
+        if self.is_quiet(dt_util.utcnow()):
+            return
+        self._last_push_time = dt_util.utcnow()
+        
+        # Remember the pushed values to compare the next changes against
+        for entity_id in self.push_thresholds:
+            if state := self.hass.states.get(entity_id):
+                try:
+                    self._push_values[entity_id] = float(state.state)
+                except ValueError:
+                    self._push_values.pop(entity_id, None)
+        
+        await self.async_send_update()
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch data from Home Assistant and send to TRMNL."""
+        # Don't collect data while TRMNL is known to be unreachable
+        if self.breaker.state == STATE_OPEN:
+            raise UpdateFailed(
+                f"TRMNL webhook unavailable, next attempt after {self.breaker.open_until}"
+            )
+        
+        self.metrics.start()
         try:
             # Collect entity data
             entity_data = await self._collect_entity_data()
             
-            # Group entities by domain
-            grouped_entities = {}
-            
-            # Add each entity to appropriate group
-            for entity in entity_data:
-                entity_id = entity["entity_id"]
-                domain = entity_id.split(".")[0]
-                
-                # Get the state object for attributes
-                state = self.hass.states.get(entity_id)
-                
-                # Create entity object
-                entity_obj = {
-                    "entity_id": entity_id.replace(".", "_"),
-                    "name": entity["name"],
-                    "current": str(entity["state"]),
-                    "last_changed": entity["last_changed"],
-                }
-                
-                # Add icon if available
-                if state and state.attributes.get("icon"):
-                    entity_obj["icon"] = state.attributes.get("icon")
-                
-                # Add device_class if available
-                if state and state.attributes.get("device_class"):
-                    entity_obj["device_class"] = state.attributes.get("device_class")
+            with self.metrics.measure(PHASE_SERIALIZATION):
+                payload = self._build_payload(entity_data)
+                body, content_hash = self._serializer.serialize(payload)
                 
-                # Add unit if available
-                if entity.get("unit"):
-                    entity_obj["unit"] = entity["unit"]
+                # Spread the entities over the pages of the sharded webhooks
+                pages, self._shard_assignment = shard_payload(
+                    payload,
+                    MAX_PAYLOAD_SIZE,
+                    len(self.webhook_ids),
+                    self._shard_assignment,
+                    self._serializer.entity_size,
+                )
                 
-                # Add 24h statistics and optionally recent data points
-                if entity.get("history"):
-                    history_data = entity["history"]
-                    values = [h["value"] for h in history_data]
-                    
-                    if values:
-                        entity_obj["24h_avg"] = f"{sum(values) / len(values):.2f}"
-                        entity_obj["24h_min"] = f"{min(values):.2f}"
-                        entity_obj["24h_max"] = f"{max(values):.2f}"
-                        
-                        # Add recent data points if requested
-                        if self.history_points > 0:
-                            num_points = min(self.history_points, len(history_data))
-                            recent_points = history_data[-num_points:]
-                            entity_obj["recent_data"] = [
-                                {
-                                    "time": dt_util.parse_datetime(point["timestamp"]).strftime("%H:%M"),
-                                    "value": f"{point['value']:.2f}"
-                                }
-                                for point in recent_points
-                            ]
-                
-                # Auto-group by domain (pluralized)
-                group_name = f"{domain}s" if not domain.endswith("s") else domain
-                
-                if group_name not in grouped_entities:
-                    grouped_entities[group_name] = []
-                
-                grouped_entities[group_name].append(entity_obj)
-            
-            # Build merge_variables
-            merge_variables = {
-                "last_update": dt_util.now().strftime("%Y-%m-%d %H:%M:%S"),
-                **grouped_entities
-            }
+                # Degrade every page until it fits the TRMNL size limit
+                fitted_pages: dict[str, dict[str, Any]] = {}
+                bodies: dict[str, bytes] = {}
+                content_hashes: dict[str, str] = {}
+                fitted_size = 0
+                bytes_saved = 0
+                reductions: list[str] = []
+                for webhook_id, page in zip(self.webhook_ids, pages):
+                    if len(pages) > 1:
+                        body, content_hash = self._serializer.serialize(page)
+                    page_size = len(body)
+                    page, fitted_page_size, page_reductions = fit_payload(
+                        page,
+                        MAX_PAYLOAD_SIZE,
+                        page_size,
+                        COMPACT_REDUCTIONS if self.compact_format else REDUCTIONS,
+                        self._serializer.entity_size,
+                    )
+                    if page_reductions:
+                        body, content_hash = self._fitted_serializer.serialize(page)
+                    fitted_pages[webhook_id] = page
+                    bodies[webhook_id] = body
+                    content_hashes[webhook_id] = content_hash
+                    fitted_size = max(fitted_size, fitted_page_size)
+                    bytes_saved += page_size - fitted_page_size
+                    reductions.extend(page_reductions)
+                    if page_reductions:
+                        _LOGGER.warning(
+                            "Payload for TRMNL webhook %s reduced to %d bytes "
+                            "to fit the TRMNL limit: %s",
+                            webhook_id,
+                            fitted_page_size,
+                            ", ".join(page_reductions),
+                        )
+                self.metrics.payload_size = fitted_size
+                # The compact format saves more than the reductions
+                self.metrics.bytes_saved = bytes_saved + sum(
+                    self._entity_objects[data["entity_id"]][2] for data in entity_data
+                )
             
-            # Prepare payload
-            payload = {
-                "merge_variables": merge_variables
+            # Skip the pages TRMNL already shows
+            now = dt_util.utcnow()
+            stale = self._is_stale(now)
+            changed = {
+                webhook_id: page
+                for webhook_id, page in fitted_pages.items()
+                if stale or content_hashes[webhook_id] != self._last_sent_hashes.get(webhook_id)
             }
-            
-            # Send to TRMNL webhook
-            await self._send_to_trmnl(payload)
-            
-            return {
+            result = {
                 "last_update": dt_util.now(),
                 "entity_count": len(entity_data),
-                "status": "success",
+                "payload_size": fitted_size,
+                "pages": len(pages),
+                "reductions": reductions,
             }
+            if not changed:
+                self.metrics.skipped_count += 1
+                _LOGGER.debug(
+                    "Payload for TRMNL webhook %s unchanged, skipping send",
+                    self.webhook_id,
+                )
+                return {**result, "status": "unchanged"}
+            
+            # Send the changed pages to their TRMNL webhooks in parallel
+            with self.metrics.measure(PHASE_HTTP):
+                results = await asyncio.gather(
+                    *(
+                        self._send_to_trmnl(webhook_id, bodies[webhook_id])
+                        for webhook_id in changed
+                    ),
+                    return_exceptions=True,
+                )
+            
+            # Remember the pages that arrived, even when another page failed
+            for (webhook_id, page), send_result in zip(changed.items(), results):
+                if not isinstance(send_result, BaseException):
+                    self._last_sent_hashes[webhook_id] = content_hashes[webhook_id]
+                    self.last_payloads[webhook_id] = page
+            self._last_payload_store.async_delay_save(
+                self._last_payload_to_save, LAST_PAYLOAD_SAVE_DELAY
+            )
+            for send_result in results:
+                if isinstance(send_result, BaseException):
+                    raise send_result
+            self._last_sent_time = now
+            
+            return {**result, "status": "success"}
             
         except Exception as err:
             _LOGGER.error("Error updating TRMNL data: %s", err)
             raise UpdateFailed(f"Error communicating with TRMNL: {err}") from err
+        finally:
+            self.metrics.finish()
+
+    def _build_payload(self, entity_data: list[dict[str, Any]]) -> dict[str, Any]:
+        """Build the TRMNL payload from the collected entity data."""
+        return build_payload(
+            entity_data, self.entity_settings, self.compact_format, self._entity_objects
+        )
+
+    def _is_stale(self, now: datetime) -> bool:
+        """Return True if unchanged data should be sent again anyway."""
+        return (
+            self.max_staleness > timedelta(0)
+            and self._last_sent_time is not None
+            and now - self._last_sent_time >= self.max_staleness
+        )
 
     async def _collect_entity_data(self) -> list[dict[str, Any]]:
         """Collect data from selected entities."""
         entity_data = []
+        statistic_ids = []
         
-        for entity_id in self.entities:
-            state = self.hass.states.get(entity_id)
-            if state is None:
-                _LOGGER.warning("Entity %s not found", entity_id)
-                continue
-            
-            data = {
-                "entity_id": entity_id,
-                "name": state.attributes.get("friendly_name", entity_id),
-                "state": state.state,
-                "unit": state.attributes.get("unit_of_measurement"),
-                "last_changed": state.last_changed.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            
-            # Add historical data if available
-            history_data = await self._get_entity_history(entity_id)
-            if history_data:
-                data["history"] = history_data
-            
-            entity_data.append(data)
+        with self.metrics.measure(PHASE_COLLECTION):
+            for entity_id in self.entities:
+                state = self.hass.states.get(entity_id)
+                if state is None:
+                    _LOGGER.warning("Entity %s not found", entity_id)
+                    continue
+                
+                metadata = self.metadata.async_get(state)
+                data = {
+                    "entity_id": entity_id,
+                    "metadata": metadata,
+                    "state": state.state,
+                    "last_changed": state.last_changed.strftime("%Y-%m-%d %H:%M:%S"),
+                    "last_updated": state.last_updated,
+                }
+                
+                entity_data.append(data)
+                
+                # Entities with a state class have long-term statistics
+                if self.statistics_mode and metadata.state_class:
+                    statistic_ids.append(entity_id)
+        
+        # Add historical data, fetched for all entities at once. Raw state
+        # history is only read for entities without usable statistics.
+        with self.metrics.measure(PHASE_HISTORY):
+            statistics_data = await self._get_statistics(statistic_ids)
+            history_data = await self._get_history(
+                [
+                    data["entity_id"]
+                    for data in entity_data
+                    if data["entity_id"] not in statistics_data
+                ]
+            )
+        for data in entity_data:
+            if aggregate := (
+                statistics_data.get(data["entity_id"])
+                or history_data.get(data["entity_id"])
+            ):
+                data["history"] = aggregate
         
         return entity_data
 
-    async def _get_entity_history(self, entity_id: str) -> list[dict[str, Any]] | None:
-        """Get historical data for an entity."""
+    async def _get_history(
+        self, entity_ids: list[str]
+    ) -> dict[str, HistoryAggregator | StateDurationAggregator]:
+        """Get aggregated history for all entities from the shared data hub."""
+        # Every entity only reads its own window
+        windows = {
+            entity_id: self.entity_settings[entity_id].window.total_seconds()
+            for entity_id in entity_ids
+        }
         try:
-            end_time = dt_util.now()
-            start_time = end_time - timedelta(hours=HISTORY_HOURS)
-            
-            # Get history from recorder
-            history_list = await get_instance(self.hass).async_add_executor_job(
-                history.state_changes_during_period,
-                self.hass,
-                start_time,
-                end_time,
-                entity_id,
+            history_list = await self._hub.async_get_history(
+                self.entry.entry_id, windows
             )
+        except Exception as err:
+            _LOGGER.debug("Could not get history for %s: %s", entity_ids, err)
+            return {}
+        
+        end_ts = dt_util.utcnow().timestamp()
+        midnight_ts = dt_util.start_of_local_day().timestamp()
+        history_data = {}
+        for entity_id, cached_samples in history_list.items():
+            settings = self.entity_settings[entity_id]
             
-            if not history_list or entity_id not in history_list:
-                return None
-            
-            # Process history data - only numeric values
-            history_data = []
-            for state in history_list[entity_id]:
-                try:
-                    value = float(state.state)
-                    history_data.append({
-                        "timestamp": state.last_changed.isoformat(),
-                        "value": value,
-                    })
-                except (ValueError, TypeError):
-                    # Skip non-numeric states
-                    continue
+            # The hub keeps the longest window any webhook needs, the
+            # aggregates read this entity's window straight from its cache
+            start_ts = end_ts - windows[entity_id]
+            aggregate = HistoryAggregator(settings.history_points, midnight_ts)
+            aggregate.add_samples(samples_since(cached_samples, start_ts))
             
-            return history_data if history_data else None
+            # Entities without numeric states get state durations instead
+            if not aggregate.count:
+                state_aggregate = StateDurationAggregator()
+                state_aggregate.add_samples(samples_since(cached_samples, start_ts))
+                history_data[entity_id] = state_aggregate
+                self.metrics.entity_samples[entity_id] = state_aggregate.count
+                continue
             
+            aggregate.close(end_ts)
+            self._downsample_recent(
+                aggregate,
+                (
+                    sample
+                    for sample in samples_since(cached_samples, start_ts)
+                    if not isinstance(sample[1], str)
+                ),
+                settings,
+            )
+            history_data[entity_id] = aggregate
+            self.metrics.entity_samples[entity_id] = aggregate.count
+        
+        return history_data
+
+    async def _get_statistics(self, entity_ids: list[str]) -> dict[str, HistoryAggregator]:
+        """Get aggregated statistics from the recorder's statistics tables."""
+        if not entity_ids:
+            return {}
+        
+        windows = {
+            entity_id: self.entity_settings[entity_id].window.total_seconds()
+            for entity_id in entity_ids
+        }
+        try:
+            statistics_list = await self._hub.async_get_statistics(
+                self.entry.entry_id, windows
+            )
         except Exception as err:
-            _LOGGER.debug("Could not get history for %s: %s", entity_id, err)
-            return None
+            _LOGGER.debug("Could not get statistics for %s: %s", entity_ids, err)
+            return {}
+        
+        end_ts = dt_util.utcnow().timestamp()
+        midnight_ts = dt_util.start_of_local_day().timestamp()
+        statistics_data = {}
+        for entity_id, cached_rows in statistics_list.items():
+            settings = self.entity_settings[entity_id]
+            start_ts = end_ts - windows[entity_id]
+            if not (rows := [row for row in cached_rows if row[0] >= start_ts]):
+                continue
+            
+            # Every row holds the mean of its 5 minutes, the last row ends
+            # 5 minutes after its start
+            aggregate = HistoryAggregator(settings.history_points, midnight_ts)
+            for start, mean, minimum, maximum in rows:
+                aggregate.add(start, mean, minimum, maximum)
+            aggregate.close(min(end_ts, rows[-1][0] + STATISTICS_PERIOD))
+            self._downsample_recent(
+                aggregate, [(row[0], row[1]) for row in rows], settings
+            )
+            statistics_data[entity_id] = aggregate
+            self.metrics.entity_samples[entity_id] = aggregate.count
+        
+        return statistics_data
 
-    async def _send_to_trmnl(self, payload: dict[str, Any]) -> None:
-        """Send data to TRMNL webhook."""
-        url = TRMNL_WEBHOOK_URL.format(webhook_id=self.webhook_id)
+    def _downsample_recent(
+        self,
+        aggregate: HistoryAggregator,
+        samples: Iterable[tuple[float, float]],
+        settings: EntitySettings,
+    ) -> None:
+        """Replace the last recent points with points spread over the window."""
+        if self.downsample_method == DOWNSAMPLE_LAST or settings.history_points <= 0:
+            return
         
-        # Check payload size (TRMNL has 2KB limit)
-        payload_json = json.dumps(payload)
-        payload_size = len(payload_json.encode('utf-8'))
+        # Recent data can not cover more than the entity's history window
+        window = min(self.recent_data_window, settings.window)
+        end_ts = dt_util.utcnow().timestamp()
+        aggregate.recent = deque(
+            downsample(
+                samples,
+                settings.history_points,
+                self.downsample_method,
+                end_ts - window.total_seconds(),
+                end_ts,
+            )
+        )
+
+    async def _send_to_trmnl(self, webhook_id: str, body: bytes) -> None:
+        """Send a serialized payload to a TRMNL webhook."""
+        url = TRMNL_WEBHOOK_URL.format(webhook_id=webhook_id)
         
-        if payload_size > 2048:  # 2KB = 2048 bytes
+        # Check payload size (TRMNL has 2KB limit)
+        size = len(body)
+        if size > MAX_PAYLOAD_SIZE:
             _LOGGER.error(
-                "Payload too large: %d bytes (max 2048 bytes). "
-                "Reduce the number of entities or set history_points to 0 in the integration settings.",
-                payload_size
+                "Payload too large: %d bytes (max %d bytes), even after all reductions. "
+                "Reduce the number of entities in the integration settings.",
+                size,
+                MAX_PAYLOAD_SIZE,
             )
             raise UpdateFailed(
-                f"Payload too large ({payload_size} bytes). "
-                f"Maximum is 2048 bytes. Reduce entities or history points."
+                f"Payload too large ({size} bytes). "
+                f"Maximum is {MAX_PAYLOAD_SIZE} bytes. Reduce entities."
             )
         
-        _LOGGER.info("Payload size: %d bytes (max 2048)", payload_size)
-        
-        max_retries = 3
-        retry_delay = 1  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        url,
-                        json=payload,
-                        timeout=aiohttp.ClientTimeout(total=10),
-                    ) as response:
-                        response.raise_for_status()
-                        _LOGGER.info(
-                            "Successfully sent data to TRMNL webhook %s",
-                            self.webhook_id,
-                        )
-                        return
-                        
-            except aiohttp.ClientError as err:
-                if attempt < max_retries - 1:
-                    _LOGGER.warning(
-                        "Failed to send to TRMNL (attempt %d/%d): %s. Retrying...",
-                        attempt + 1,
-                        max_retries,
-                        err,
-                    )
-                    await asyncio.sleep(retry_delay * (2 ** attempt))
-                else:
-                    _LOGGER.error(
-                        "Failed to send to TRMNL after %d attempts: %s",
-                        max_retries,
-                        err,
-                    )
-                    raise
\ No newline at end of file
+        _LOGGER.info("Payload size: %d bytes (max %d)", size, MAX_PAYLOAD_SIZE)
+        
+        await self._sender.async_send(
+            url, body, self.breaker, self._async_count_retry
+        )
+        _LOGGER.info(
+            "Successfully sent data to TRMNL webhook %s",
+            webhook_id,
+        )
+
+    @callback
+    def _async_count_retry(self) -> None:
+        """Count a retry of a send."""
+        self.metrics.retry_count += 1
@@ -0,0 +1,35 @@
+"""Diagnostics support for TRMNL Webhook."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_SHARD_WEBHOOK_IDS, CONF_WEBHOOK_ID, DOMAIN
+from .coordinator import TRMNLCoordinator
+
+TO_REDACT = {CONF_SHARD_WEBHOOK_IDS, CONF_WEBHOOK_ID}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: TRMNLCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "config": async_redact_data(dict(entry.data), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "last_exception": str(coordinator.last_exception)
+        if coordinator.last_exception
+        else None,
+        "data": coordinator.data,
+        "metrics": coordinator.metrics.as_dict(),
+        "circuit_breaker": {
+            "state": coordinator.breaker.state,
+            "failures": coordinator.breaker.failures,
+            "open_until": coordinator.breaker.open_until,
+        },
+    }
@@ -0,0 +1,132 @@
+"""Downsampling of history samples for TRMNL trend graphs."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from .const import (
+    DOWNSAMPLE_LTTB,
+    DOWNSAMPLE_MEAN,
+    DOWNSAMPLE_MINMAX,
+)
+
+
+def _buckets(
+    samples: Iterable[tuple[float, float]],
+    num_buckets: int,
+    start_ts: float,
+    end_ts: float,
+) -> tuple[list[list[tuple[float, float]]], float | None]:
+    """Split time ordered samples into equal time buckets in a single pass.
+
+    Returns the buckets and the value in effect at the start of the window.
+    """
+    buckets: list[list[tuple[float, float]]] = [[] for _ in range(num_buckets)]
+    width = (end_ts - start_ts) / num_buckets
+    initial = None
+
+    for timestamp, value in samples:
+        if timestamp < start_ts:
+            initial = value
+            continue
+        index = min(int((timestamp - start_ts) / width), num_buckets - 1)
+        buckets[index].append((timestamp, value))
+
+    return buckets, initial
+
+
+def downsample(
+    samples: Iterable[tuple[float, float]],
+    num_points: int,
+    method: str,
+    start_ts: float,
+    end_ts: float,
+) -> list[tuple[float, float]]:
+    """Reduce samples to about num_points points spread evenly over the window.
+
+    States hold until the next change, so buckets without samples repeat the
+    value that was in effect.
+    """
+    if num_points <= 0 or end_ts <= start_ts:
+        return []
+
+    # Min/max emits two points per bucket
+    num_buckets = max(num_points // 2, 1) if method == DOWNSAMPLE_MINMAX else num_points
+    buckets, last_value = _buckets(samples, num_buckets, start_ts, end_ts)
+    width = (end_ts - start_ts) / num_buckets
+
+    # A single point has no room for a min/max pair or a triangle, both send
+    # the newest sample
+    if num_points == 1 and method in (DOWNSAMPLE_LTTB, DOWNSAMPLE_MINMAX):
+        if buckets[0]:
+            return [buckets[0][-1]]
+        return [] if last_value is None else [(start_ts, last_value)]
+
+    if method == DOWNSAMPLE_LTTB:
+        return _lttb(buckets, last_value, start_ts, width)
+
+    points: list[tuple[float, float]] = []
+    for index, bucket in enumerate(buckets):
+        bucket_start = start_ts + index * width
+        if not bucket:
+            if last_value is not None:
+                points.append((bucket_start, last_value))
+            continue
+
+        if method == DOWNSAMPLE_MEAN:
+            points.append(
+                (bucket_start, sum(value for _, value in bucket) / len(bucket))
+            )
+        elif method == DOWNSAMPLE_MINMAX:
+            low = min(bucket, key=lambda sample: sample[1])
+            high = max(bucket, key=lambda sample: sample[1])
+            points.extend(sorted({low, high}))
+        last_value = bucket[-1][1]
+
+    return points
+
+
+def _lttb(
+    buckets: list[list[tuple[float, float]]],
+    last_value: float | None,
+    start_ts: float,
+    width: float,
+) -> list[tuple[float, float]]:
+    """Largest-Triangle-Three-Buckets over time buckets.
+
+    Picks the sample per bucket that forms the largest triangle with the
+    previously picked point and the average of the next bucket.
+    """
+    # Fill empty buckets with the value in effect so the line stays flat
+    for index, bucket in enumerate(buckets):
+        if bucket:
+            last_value = bucket[-1][1]
+        elif last_value is not None:
+            bucket.append((start_ts + index * width, last_value))
+
+    filled = [bucket for bucket in buckets if bucket]
+    if not filled:
+        return []
+
+    points = [filled[0][0]]
+    for index, bucket in enumerate(filled[1:], 1):
+        if index == len(filled) - 1:
+            # The last bucket has nothing to look ahead to, keep its last sample
+            points.append(bucket[-1])
+            break
+
+        next_bucket = filled[index + 1]
+        avg_ts = sum(ts for ts, _ in next_bucket) / len(next_bucket)
+        avg_value = sum(value for _, value in next_bucket) / len(next_bucket)
+        prev_ts, prev_value = points[-1]
+
+        points.append(
+            max(
+                bucket,
+                key=lambda sample: abs(
+                    (prev_ts - avg_ts) * (sample[1] - prev_value)
+                    - (prev_ts - sample[0]) * (avg_value - prev_value)
+                ),
+            )
+        )
+
+    return points
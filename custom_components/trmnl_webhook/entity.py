@@ -0,0 +1,17 @@
+"""Shared entity helpers for TRMNL Webhook."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+
+from .const import DOMAIN
+
+
+def webhook_device_info(entry: ConfigEntry) -> DeviceInfo:
+    """Return the device of a webhook, so it can be targeted by area or device."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.title,
+        manufacturer="TRMNL",
+        entry_type=DeviceEntryType.SERVICE,
+    )
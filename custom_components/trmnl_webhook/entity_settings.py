@@ -0,0 +1,56 @@
+"""Per-entity history settings for TRMNL."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from .const import (
+    CONF_HISTORY_HOURS,
+    CONF_HISTORY_POINTS,
+    CONF_PRECISION,
+    CONF_STATS,
+    DEFAULT_STATS,
+    HISTORY_HOURS,
+    STATS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EntitySettings:
+    """History settings of an entity, with its overrides applied."""
+
+    window: timedelta
+    stats: tuple[str, ...]
+    history_points: int
+    precision: int | None
+
+    @classmethod
+    def from_config(
+        cls, overrides: dict[str, Any] | None, history_points: int
+    ) -> EntitySettings:
+        """Build the settings from the overrides of an entity and the defaults."""
+        overrides = overrides or {}
+        precision = overrides.get(CONF_PRECISION)
+        return cls(
+            window=timedelta(hours=int(overrides.get(CONF_HISTORY_HOURS, HISTORY_HOURS))),
+            # Keep the stats in a fixed order, whatever order they were picked in
+            stats=tuple(
+                stat for stat in STATS if stat in overrides.get(CONF_STATS, DEFAULT_STATS)
+            ),
+            history_points=int(overrides.get(CONF_HISTORY_POINTS, history_points)),
+            precision=None if precision is None else int(precision),
+        )
+
+
+def build_entity_settings(
+    entity_ids: list[str],
+    overrides: dict[str, dict[str, Any]] | None,
+    history_points: int,
+) -> dict[str, EntitySettings]:
+    """Build the settings of every entity of a webhook."""
+    overrides = overrides or {}
+    return {
+        entity_id: EntitySettings.from_config(overrides.get(entity_id), history_points)
+        for entity_id in entity_ids
+    }
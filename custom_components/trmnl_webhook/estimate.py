@@ -0,0 +1,174 @@
+"""Payload size estimate for the TRMNL config flow."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_COMPACT_FORMAT,
+    CONF_ENTITIES,
+    CONF_ENTITY_SETTINGS,
+    CONF_HISTORY_POINTS,
+    CONF_SHARD_WEBHOOK_IDS,
+    DEFAULT_COMPACT_FORMAT,
+    DEFAULT_HISTORY_POINTS,
+    MAX_PAYLOAD_SIZE,
+)
+from .coordinator import build_payload
+from .entity_settings import EntitySettings, build_entity_settings
+from .history import HistoryAggregator, StateDurationAggregator, samples_since
+from .hub import async_get_hub
+from .metadata import EntityMetadata
+from .payload import (
+    COMPACT_REDUCTIONS,
+    REDUCTIONS,
+    fit_payload,
+    payload_size,
+    shard_payload,
+)
+
+# Entities listed in the size breakdown
+MAX_BREAKDOWN_ENTITIES = 5
+
+
+@dataclass
+class PayloadEstimate:
+    """Projected size of a webhook's payload."""
+
+    size: int
+    # Size of the largest page after reductions
+    fitted_size: int
+    reductions: list[str] = field(default_factory=list)
+    # (entity_id, bytes), largest first
+    entities: list[tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def fits(self) -> bool:
+        """Return True if the payload fits the TRMNL limit after reductions."""
+        return self.fitted_size <= MAX_PAYLOAD_SIZE
+
+    def breakdown(self) -> str:
+        """Return the largest entities as a text list."""
+        return "\n".join(
+            f"- {entity_id}: {size} bytes"
+            for entity_id, size in self.entities[:MAX_BREAKDOWN_ENTITIES]
+        )
+
+
+@callback
+def async_estimate_payload(
+    hass: HomeAssistant, data: Mapping[str, Any]
+) -> PayloadEstimate:
+    """Dry-run the payload builder for a webhook configuration.
+
+    Uses the current states and the history the data hub already cached.
+    Entities without cached history get a stand-in history repeating their
+    current state, so nothing is read from the recorder or sent to TRMNL.
+    """
+    entity_ids = data.get(CONF_ENTITIES) or []
+    entity_settings = build_entity_settings(
+        entity_ids,
+        data.get(CONF_ENTITY_SETTINGS),
+        int(data.get(CONF_HISTORY_POINTS, DEFAULT_HISTORY_POINTS)),
+    )
+    compact_format = data.get(CONF_COMPACT_FORMAT, DEFAULT_COMPACT_FORMAT)
+    hub = async_get_hub(hass)
+    end_ts = dt_util.utcnow().timestamp()
+
+    entity_data = []
+    for entity_id in entity_ids:
+        if (state := hass.states.get(entity_id)) is None:
+            continue
+
+        settings = entity_settings[entity_id]
+        start_ts = end_ts - settings.window.total_seconds()
+        if (cached := hub.async_get_cached_history(entity_id)) is not None:
+            samples = list(samples_since(cached, start_ts))
+        else:
+            samples = _stand_in_samples(state, settings, start_ts, end_ts)
+
+        entity_data.append(
+            {
+                "entity_id": entity_id,
+                "metadata": EntityMetadata.from_state(state),
+                "state": state.state,
+                "last_changed": state.last_changed.strftime("%Y-%m-%d %H:%M:%S"),
+                "history": _aggregate(samples, settings, end_ts),
+            }
+        )
+
+    payload = build_payload(entity_data, entity_settings, compact_format)
+    size = payload_size(payload)
+    
+    # Every sharded webhook gets one page
+    pages, _ = shard_payload(
+        payload, MAX_PAYLOAD_SIZE, 1 + len(data.get(CONF_SHARD_WEBHOOK_IDS) or [])
+    )
+    fitted_size = 0
+    reductions: list[str] = []
+    for page in pages:
+        _, fitted_page_size, page_reductions = fit_payload(
+            page,
+            MAX_PAYLOAD_SIZE,
+            size if len(pages) == 1 else None,
+            COMPACT_REDUCTIONS if compact_format else REDUCTIONS,
+        )
+        fitted_size = max(fitted_size, fitted_page_size)
+        reductions.extend(page_reductions)
+
+    # Size per entity, found back by its id in the payload
+    entity_ids_by_payload_id = {
+        entity["metadata"].payload_id: entity["entity_id"] for entity in entity_data
+    }
+    id_key = "id" if compact_format else "entity_id"
+    breakdown = sorted(
+        (
+            (entity_ids_by_payload_id[entity[id_key]], payload_size(entity))
+            for value in payload["merge_variables"].values()
+            if isinstance(value, list)
+            for entity in value
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+    return PayloadEstimate(size, fitted_size, reductions, breakdown)
+
+
+def _stand_in_samples(
+    state: State, settings: EntitySettings, start_ts: float, end_ts: float
+) -> list[tuple[float, float | str]]:
+    """Return a history repeating the current state over the window."""
+    try:
+        value: float | str = float(state.state)
+    except ValueError:
+        return [(start_ts, state.state)]
+
+    points = max(settings.history_points, 1)
+    step = (end_ts - start_ts) / points
+    return [(start_ts + index * step, value) for index in range(points)]
+
+
+def _aggregate(
+    samples: list[tuple[float, float | str]], settings: EntitySettings, end_ts: float
+) -> HistoryAggregator | StateDurationAggregator | None:
+    """Aggregate samples like a refresh does, without downsampling."""
+    if not samples:
+        return None
+
+    numeric_samples = [sample for sample in samples if not isinstance(sample[1], str)]
+    if not numeric_samples:
+        state_aggregate = StateDurationAggregator()
+        state_aggregate.add_samples(samples)
+        return state_aggregate
+
+    aggregate = HistoryAggregator(
+        settings.history_points, dt_util.start_of_local_day().timestamp()
+    )
+    aggregate.add_samples(numeric_samples)
+    aggregate.close(end_ts)
+    return aggregate
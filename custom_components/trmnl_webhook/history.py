@@ -0,0 +1,536 @@
+"""Recorder history access for TRMNL."""
+from __future__ import annotations
+
+import asyncio
+import bisect
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime, timedelta
+import itertools
+import logging
+import math
+from operator import itemgetter
+from typing import Any
+
+from homeassistant.components.recorder import get_instance, history
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.const import (
+    COMPRESSED_STATE_LAST_CHANGED,
+    COMPRESSED_STATE_LAST_UPDATED,
+    COMPRESSED_STATE_STATE,
+)
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    STAT_AVG,
+    STAT_DELTA,
+    STAT_INTEGRAL,
+    STAT_LAST,
+    STAT_MAX,
+    STAT_MIN,
+    STAT_RATE,
+    STAT_SUM,
+    STAT_TODAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# The cache only saves a rescan after a restart and Store writes it at
+# shutdown anyway, so don't rewrite the whole window on every refresh
+STORAGE_SAVE_DELAY = 3600  # seconds
+
+# HistoryAggregator attribute of each statistic
+STAT_ATTRIBUTES = {
+    STAT_AVG: "mean",
+    STAT_MIN: "minimum",
+    STAT_MAX: "maximum",
+    STAT_LAST: "last",
+    STAT_DELTA: "delta",
+    STAT_SUM: "total",
+    STAT_INTEGRAL: "integral",
+    STAT_RATE: "rate",
+    STAT_TODAY: "today_delta",
+}
+
+# Length of a row of the recorder's short-term statistics
+STATISTICS_PERIOD = 300  # seconds
+
+# Overlap with the previous query to catch states the recorder had not
+# committed yet when that query ran.
+RECORDER_COMMIT_MARGIN = 30  # seconds
+
+
+async def async_get_history(
+    hass: HomeAssistant,
+    entity_ids: Iterable[str],
+    start_time: datetime,
+    end_time: datetime,
+    include_start_time_state: bool = True,
+) -> dict[str, list[tuple[float, str]]]:
+    """Fetch the state history of all entities with a single recorder query.
+
+    Returns a mapping of entity_id to a list of (timestamp, state) tuples,
+    ordered by time.
+    """
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return {}
+
+    return await get_instance(hass).async_add_executor_job(
+        _get_history,
+        hass,
+        entity_ids,
+        start_time,
+        end_time,
+        include_start_time_state,
+    )
+
+
+def _get_history(
+    hass: HomeAssistant,
+    entity_ids: list[str],
+    start_time: datetime,
+    end_time: datetime,
+    include_start_time_state: bool,
+) -> dict[str, list[tuple[float, str]]]:
+    """Query the recorder and split the rows per entity (runs in the executor)."""
+    # Only state changes are needed, so skip attributes and let the recorder
+    # return compact rows with float timestamps.
+    states = history.get_significant_states(
+        hass,
+        start_time,
+        end_time,
+        entity_ids,
+        include_start_time_state=include_start_time_state,
+        significant_changes_only=True,
+        minimal_response=True,
+        no_attributes=True,
+        compressed_state_format=True,
+    )
+
+    return {
+        entity_id: [_row_to_sample(row) for row in rows]
+        for entity_id, rows in states.items()
+        if rows
+    }
+
+
+async def async_get_statistics(
+    hass: HomeAssistant,
+    statistic_ids: Iterable[str],
+    start_time: datetime,
+    end_time: datetime,
+) -> dict[str, list[tuple[float, float, float, float]]]:
+    """Fetch the 5-minute mean/min/max statistics of all entities at once.
+
+    Returns a mapping of statistic_id to a list of (start, mean, min, max)
+    tuples, ordered by time. Entities without mean statistics (e.g. sensors
+    with a total state class) are left out.
+    """
+    statistic_ids = set(statistic_ids)
+    if not statistic_ids:
+        return {}
+
+    statistics = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start_time,
+        end_time,
+        statistic_ids,
+        "5minute",
+        None,
+        {"mean", "min", "max"},
+    )
+
+    result = {}
+    for statistic_id, rows in statistics.items():
+        if rows := [
+            (row["start"], row["mean"], row["min"], row["max"])
+            for row in rows
+            if row.get("mean") is not None
+        ]:
+            result[statistic_id] = rows
+
+    return result
+
+
+def _row_to_sample(row: dict[str, Any] | State) -> tuple[float, str]:
+    """Convert a recorder row to a (timestamp, state) tuple."""
+    if isinstance(row, State):
+        return row.last_changed.timestamp(), row.state
+
+    timestamp = row.get(COMPRESSED_STATE_LAST_CHANGED, row[COMPRESSED_STATE_LAST_UPDATED])
+    return timestamp, row[COMPRESSED_STATE_STATE]
+
+
+def samples_since(
+    samples: Sequence[tuple[float, float | str]], start_ts: float
+) -> Iterator[tuple[float, float | str]]:
+    """Yield the time ordered samples from start_ts on.
+
+    The start of the window is found with a binary search, and the state
+    that was active at start_ts is included as a sample at start_ts.
+    """
+    index = bisect.bisect_left(samples, start_ts, key=itemgetter(0))
+    if index and (index == len(samples) or samples[index][0] > start_ts):
+        yield start_ts, samples[index - 1][1]
+    yield from itertools.islice(samples, index, None)
+
+
+class HistoryAggregator:
+    """Single-pass aggregate of a stream of numeric history samples.
+
+    Keeps a running count/sum/min/max, the first and last value and the
+    last ``recent_points`` (timestamp, value) pairs, so no intermediate
+    lists are built.
+
+    The same pass derives the time-weighted statistics: every value counts
+    for as long as it was the state (like the recorder's statistics), the
+    integral interpolates linearly between samples (like the integration
+    helper). Call close() with the end of the window to count the last
+    value up to then. midnight_ts enables the change since midnight.
+
+    Every accumulator is updated for every sample whatever statistics an
+    entity sends; the payload builder picks the selected ones.
+    """
+
+    __slots__ = (
+        "count",
+        "total",
+        "minimum",
+        "maximum",
+        "first",
+        "last",
+        "recent",
+        "weighted_total",
+        "area",
+        "duration",
+        "last_ts",
+        "midnight_ts",
+        "midnight_value",
+    )
+
+    def __init__(self, recent_points: int = 0, midnight_ts: float | None = None) -> None:
+        """Initialize the aggregator."""
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self.first = 0.0
+        self.last = 0.0
+        self.recent: deque[tuple[float, float]] = deque(maxlen=recent_points)
+        # Value x seconds, held and interpolated, and the seconds covered
+        self.weighted_total = 0.0
+        self.area = 0.0
+        self.duration = 0.0
+        self.last_ts = 0.0
+        self.midnight_ts = midnight_ts
+        self.midnight_value: float | None = None
+
+    def add(
+        self,
+        timestamp: float,
+        value: float,
+        minimum: float | None = None,
+        maximum: float | None = None,
+    ) -> None:
+        """Add a sample, optionally with its own min/max (pre-aggregated rows)."""
+        if self.count:
+            elapsed = max(0.0, timestamp - self.last_ts)
+            self.weighted_total += self.last * elapsed
+            self.area += (self.last + value) / 2 * elapsed
+            self.duration += elapsed
+        else:
+            self.first = value
+        if self.midnight_ts is not None and timestamp <= self.midnight_ts:
+            self.midnight_value = value
+        self.last = value
+        self.last_ts = timestamp
+        self.count += 1
+        self.total += value
+        if (value if minimum is None else minimum) < self.minimum:
+            self.minimum = value if minimum is None else minimum
+        if (value if maximum is None else maximum) > self.maximum:
+            self.maximum = value if maximum is None else maximum
+        self.recent.append((timestamp, value))
+
+    def add_samples(self, samples: Iterable[tuple[float, float | str]]) -> None:
+        """Add a stream of (timestamp, value) samples, skipping non-numeric states."""
+        for timestamp, value in samples:
+            if not isinstance(value, str):
+                self.add(timestamp, value)
+
+    def close(self, end_ts: float) -> None:
+        """Hold the last value until end_ts, the end of the window."""
+        if not self.count or end_ts <= self.last_ts:
+            return
+        elapsed = end_ts - self.last_ts
+        self.weighted_total += self.last * elapsed
+        self.area += self.last * elapsed
+        self.duration += elapsed
+        self.last_ts = end_ts
+
+    @property
+    def mean(self) -> float:
+        """Return the time-weighted mean, or the plain mean of one instant."""
+        if self.duration > 0:
+            return self.weighted_total / self.duration
+        return self.total / self.count
+
+    @property
+    def delta(self) -> float:
+        """Return the change from the first to the last sample."""
+        return self.last - self.first
+
+    @property
+    def integral(self) -> float:
+        """Return the trapezoidal integral in value x hours (e.g. W to Wh)."""
+        return self.area / 3600
+
+    @property
+    def rate(self) -> float:
+        """Return the average change per hour over the window."""
+        if self.duration > 0:
+            return self.delta / self.duration * 3600
+        return 0.0
+
+    @property
+    def today_delta(self) -> float:
+        """Return the change since midnight.
+
+        Falls back to the change since the start of the window when the
+        window starts after midnight.
+        """
+        if self.midnight_value is None:
+            return self.delta
+        return self.last - self.midnight_value
+
+
+class StateDurationAggregator:
+    """Single-pass time share per state of a stream of history samples.
+
+    Keeps the time spent in every state, the number of transitions and
+    when each state was last changed to. The first sample is the state at
+    the start of the window and does not count as a transition.
+    """
+
+    __slots__ = ("count", "durations", "transitions", "last_changed_to", "state", "since")
+
+    def __init__(self) -> None:
+        """Initialize the aggregator."""
+        self.count = 0
+        self.durations: dict[str, float] = {}
+        self.transitions = 0
+        self.last_changed_to: dict[str, float] = {}
+        self.state: str | None = None
+        self.since = 0.0
+
+    def add(self, timestamp: float, state: str) -> None:
+        """Add a sample."""
+        self.count += 1
+        if self.state is not None:
+            if state == self.state:
+                return
+            self.durations[self.state] = (
+                self.durations.get(self.state, 0.0) + timestamp - self.since
+            )
+            self.transitions += 1
+            self.last_changed_to[state] = timestamp
+        self.state = state
+        self.since = timestamp
+
+    def add_samples(self, samples: Iterable[tuple[float, float | str]]) -> None:
+        """Add a stream of (timestamp, state) samples."""
+        for timestamp, state in samples:
+            self.add(timestamp, state if isinstance(state, str) else f"{state:g}")
+
+    def shares(self, end_ts: float, limit: int | None = None) -> list[tuple[str, float]]:
+        """Return the share of time per state up to end_ts, largest first."""
+        if self.state is None:
+            return []
+
+        durations = dict(self.durations)
+        durations[self.state] = durations.get(self.state, 0.0) + max(
+            0.0, end_ts - self.since
+        )
+        if (total := sum(durations.values())) <= 0:
+            return [(self.state, 1.0)]
+
+        return sorted(
+            ((state, duration / total) for state, duration in durations.items()),
+            key=lambda share: share[1],
+            reverse=True,
+        )[:limit]
+
+
+class HistoryCache:
+    """Rolling window of history samples per entity.
+
+    Numeric states are kept as floats, other states as strings. Every
+    entity has its own window length.
+
+    Only the states recorded since the previous update are read from the
+    recorder; older samples are kept in memory and persisted with a Store so
+    a restart does not require a full rescan of the window. The Store is
+    written at shutdown and at most hourly, a crash only costs a rescan.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.history"
+        )
+        self._samples: dict[str, deque[tuple[float, float | str]]] = {}
+        self._high_water: dict[str, float] = {}
+        self._windows: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_update(
+        self, entity_windows: dict[str, float]
+    ) -> dict[str, deque[tuple[float, float | str]]]:
+        """Bring the cache up to date and return the samples per entity.
+
+        entity_windows maps the entities to their window length in seconds.
+        """
+        async with self._lock:
+            if not self._loaded:
+                await self._async_load()
+
+            end_time = dt_util.utcnow()
+            end_ts = end_time.timestamp()
+
+            # Forget entities that are no longer configured, went stale or
+            # need a longer window than is cached
+            for entity_id in list(self._high_water):
+                if (
+                    (window := entity_windows.get(entity_id)) is None
+                    or self._high_water[entity_id] < end_ts - window
+                    or self._windows.get(entity_id, 0.0) < window
+                ):
+                    self._high_water.pop(entity_id)
+                    self._samples.pop(entity_id, None)
+                    self._windows.pop(entity_id, None)
+
+            cold = [e for e in entity_windows if e not in self._high_water]
+            warm = [e for e in entity_windows if e in self._high_water]
+
+            # Entities without cached data need their full window, queried
+            # together per window length
+            cold_windows: dict[float, list[str]] = {}
+            for entity_id in cold:
+                cold_windows.setdefault(entity_windows[entity_id], []).append(entity_id)
+            for window, entity_ids in cold_windows.items():
+                self._merge(
+                    entity_ids,
+                    await async_get_history(
+                        self.hass,
+                        entity_ids,
+                        end_time - timedelta(seconds=window),
+                        end_time,
+                    ),
+                    end_ts,
+                )
+
+            # The rest only need what was recorded since the last update
+            if warm:
+                delta_start = dt_util.utc_from_timestamp(
+                    min(self._high_water[e] for e in warm) - RECORDER_COMMIT_MARGIN
+                )
+                self._merge(
+                    warm,
+                    await async_get_history(
+                        self.hass,
+                        warm,
+                        delta_start,
+                        end_time,
+                        include_start_time_state=False,
+                    ),
+                    end_ts,
+                )
+
+            for entity_id, window in entity_windows.items():
+                self._windows[entity_id] = window
+                self._prune(entity_id, end_ts - window)
+
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+            return {
+                entity_id: samples
+                for entity_id, samples in self._samples.items()
+                if samples
+            }
+
+    async def async_remove(self) -> None:
+        """Remove the persisted cache."""
+        await self._store.async_remove()
+
+    def _merge(
+        self,
+        entity_ids: list[str],
+        history_list: dict[str, list[tuple[float, str]]],
+        end_ts: float,
+    ) -> None:
+        """Append new samples and advance the high-water marks."""
+        for entity_id in entity_ids:
+            samples = self._samples.setdefault(entity_id, deque())
+            for timestamp, state in history_list.get(entity_id, ()):
+                # Skip states already cached by a previous, overlapping query
+                if samples and timestamp <= samples[-1][0]:
+                    continue
+                try:
+                    value: float | str = float(state)
+                except (ValueError, TypeError):
+                    value = state
+                else:
+                    # "nan" and "inf" are not valid JSON and spoil min/max/mean
+                    if not math.isfinite(value):
+                        value = state
+                # Non-numeric states are kept for the state durations
+                samples.append((timestamp, value))
+            self._high_water[entity_id] = end_ts
+
+    def _prune(self, entity_id: str, window_start_ts: float) -> None:
+        """Drop samples that fell out of the window."""
+        samples = self._samples.get(entity_id)
+        if not samples or samples[0][0] >= window_start_ts:
+            return
+
+        dropped = None
+        while samples and samples[0][0] < window_start_ts:
+            dropped = samples.popleft()
+
+        # Keep the state that was active at the start of the window
+        if dropped is not None and (not samples or samples[0][0] > window_start_ts):
+            samples.appendleft((window_start_ts, dropped[1]))
+
+    async def _async_load(self) -> None:
+        """Load the persisted cache."""
+        self._loaded = True
+        if (data := await self._store.async_load()) is None:
+            return
+
+        for entity_id, entity_data in data.get("entities", {}).items():
+            self._high_water[entity_id] = entity_data["high_water"]
+            self._windows[entity_id] = entity_data.get("window", 0.0)
+            self._samples[entity_id] = deque(
+                (timestamp, value) for timestamp, value in entity_data["samples"]
+            )
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
+            "entities": {
+                entity_id: {
+                    "high_water": high_water,
+                    "window": self._windows.get(entity_id, 0.0),
+                    "samples": list(self._samples.get(entity_id, ())),
+                }
+                for entity_id, high_water in self._high_water.items()
+            }
+        }
@@ -0,0 +1,153 @@
+"""Integration-wide data hub for TRMNL."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import timedelta
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .history import HistoryCache, async_get_statistics
+
+DATA_HUB = f"{DOMAIN}_hub"
+
+# Refreshes of different webhooks within this time share one recorder query
+HUB_TICK = 10  # seconds
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> TRMNLDataHub:
+    """Return the data hub shared by all config entries."""
+    if (hub := hass.data.get(DATA_HUB)) is None:
+        hub = hass.data[DATA_HUB] = TRMNLDataHub(hass)
+    return hub
+
+
+class TRMNLDataHub:
+    """Collect history once per unique entity for all webhooks.
+
+    Every webhook requests the entities it needs; the hub updates the
+    history of the union of those entities in a single recorder query per
+    tick and hands each webhook its subset. Aggregation and formatting stay
+    with the webhooks, so each can use its own settings.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self._history_cache = HistoryCache(hass)
+        self._history_entities: dict[str, dict[str, float]] = {}
+        self._history: dict[str, deque[tuple[float, float | str]]] = {}
+        self._history_fetched: dict[str, float] = {}
+        self._history_updated = float("-inf")
+        self._history_lock = asyncio.Lock()
+        self._statistics: dict[str, list[tuple[float, float, float, float]]] = {}
+        self._statistics_updated: dict[str, tuple[float, float]] = {}
+        self._statistics_entities: dict[str, set[str]] = {}
+        self._statistics_lock = asyncio.Lock()
+
+    @callback
+    def async_unregister(self, key: str) -> None:
+        """Stop keeping history for the entities of a webhook."""
+        self._history_entities.pop(key, None)
+        self._statistics_entities.pop(key, None)
+        self._async_prune_statistics()
+
+    @callback
+    def _async_prune_statistics(self) -> None:
+        """Forget the statistics of entities no webhook requests anymore."""
+        requested = set().union(*self._statistics_entities.values())
+        for entity_id in self._statistics_updated.keys() - requested:
+            self._statistics_updated.pop(entity_id)
+            self._statistics.pop(entity_id, None)
+
+    async def async_get_history(
+        self, key: str, entity_windows: dict[str, float]
+    ) -> dict[str, deque[tuple[float, float | str]]]:
+        """Return the cached history samples of the entities.
+
+        key identifies the requesting webhook; the entities it requested
+        last are kept in the cache until it unregisters. entity_windows maps
+        the entities to their window length in seconds. The samples can
+        cover a longer window when another webhook needs it.
+        """
+        self._history_entities[key] = entity_windows
+
+        async with self._history_lock:
+            if time.monotonic() - self._history_updated > HUB_TICK or any(
+                self._history_fetched.get(entity_id, 0.0) < window
+                for entity_id, window in entity_windows.items()
+            ):
+                # Every entity is kept for the longest window requested
+                all_entity_windows: dict[str, float] = {}
+                for requested in self._history_entities.values():
+                    for entity_id, window in requested.items():
+                        all_entity_windows[entity_id] = max(
+                            window, all_entity_windows.get(entity_id, 0.0)
+                        )
+                self._history = await self._history_cache.async_update(
+                    all_entity_windows
+                )
+                self._history_fetched = all_entity_windows
+                self._history_updated = time.monotonic()
+
+        return {
+            entity_id: self._history[entity_id]
+            for entity_id in entity_windows
+            if entity_id in self._history
+        }
+
+    @callback
+    def async_get_cached_history(
+        self, entity_id: str
+    ) -> deque[tuple[float, float | str]] | None:
+        """Return the history samples of an entity if they are cached."""
+        return self._history.get(entity_id)
+
+    async def async_get_statistics(
+        self, key: str, entity_windows: dict[str, float]
+    ) -> dict[str, list[tuple[float, float, float, float]]]:
+        """Return the 5-minute statistics rows of the entities.
+
+        key identifies the requesting webhook, like for async_get_history.
+        entity_windows maps the entities to their window length in seconds.
+        """
+        self._statistics_entities[key] = set(entity_windows)
+        
+        async with self._statistics_lock:
+            self._async_prune_statistics()
+
+            now = time.monotonic()
+            stale: dict[float, list[str]] = {}
+            for entity_id, window in entity_windows.items():
+                updated, fetched_window = self._statistics_updated.get(
+                    entity_id, (float("-inf"), 0.0)
+                )
+                if now - updated > HUB_TICK or fetched_window < window:
+                    stale.setdefault(window, []).append(entity_id)
+
+            # One query per window length, so no entity reads more than it needs
+            end_time = dt_util.now()
+            for window, entity_ids in stale.items():
+                statistics = await async_get_statistics(
+                    self.hass, entity_ids, end_time - timedelta(seconds=window), end_time
+                )
+                for entity_id in entity_ids:
+                    self._statistics_updated[entity_id] = (now, window)
+                    if rows := statistics.get(entity_id):
+                        self._statistics[entity_id] = rows
+                    else:
+                        self._statistics.pop(entity_id, None)
+
+        return {
+            entity_id: self._statistics[entity_id]
+            for entity_id in entity_windows
+            if entity_id in self._statistics
+        }
+
+    async def async_remove(self) -> None:
+        """Remove the persisted history cache."""
+        await self._history_cache.async_remove()
@@ -0,0 +1,130 @@
+"""Entity metadata cache for TRMNL."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from homeassistant.const import (
+    ATTR_DEVICE_CLASS,
+    ATTR_FRIENDLY_NAME,
+    ATTR_ICON,
+    ATTR_UNIT_OF_MEASUREMENT,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import (
+    EventStateChangedData,
+    async_track_state_change_event,
+)
+
+ATTR_STATE_CLASS = "state_class"
+
+# Attributes the payload is built from
+PROJECTED_ATTRIBUTES = (
+    ATTR_FRIENDLY_NAME,
+    ATTR_ICON,
+    ATTR_DEVICE_CLASS,
+    ATTR_UNIT_OF_MEASUREMENT,
+    ATTR_STATE_CLASS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EntityMetadata:
+    """Static part of an entity in the payload."""
+
+    entity_id: str
+    payload_id: str
+    group_name: str
+    name: str
+    icon: str | None
+    device_class: str | None
+    unit: str | None
+    state_class: str | None
+
+    @classmethod
+    def from_state(cls, state: State) -> EntityMetadata:
+        """Build the metadata from a state."""
+        entity_id = state.entity_id
+        domain = state.domain
+        attributes = state.attributes
+        return cls(
+            entity_id=entity_id,
+            payload_id=entity_id.replace(".", "_"),
+            # Auto-group by domain (pluralized)
+            group_name=f"{domain}s" if not domain.endswith("s") else domain,
+            name=attributes.get(ATTR_FRIENDLY_NAME, entity_id),
+            icon=attributes.get(ATTR_ICON) or None,
+            device_class=attributes.get(ATTR_DEVICE_CLASS) or None,
+            unit=attributes.get(ATTR_UNIT_OF_MEASUREMENT) or None,
+            state_class=attributes.get(ATTR_STATE_CLASS) or None,
+        )
+
+
+def _projection(state: State) -> tuple:
+    """Return the attributes the metadata is built from."""
+    attributes = state.attributes
+    return tuple(attributes.get(attribute) for attribute in PROJECTED_ATTRIBUTES)
+
+
+class EntityMetadataCache:
+    """Metadata of the configured entities, built once per entity.
+
+    Entries are dropped when a state change alters one of the projected
+    attributes or when the entity registry entry is updated.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_ids: list[str]) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.entity_ids = entity_ids
+        self._metadata: dict[str, EntityMetadata] = {}
+
+    @callback
+    def async_get(self, state: State) -> EntityMetadata:
+        """Return the metadata of an entity, building it when needed."""
+        if (metadata := self._metadata.get(state.entity_id)) is None:
+            metadata = self._metadata[state.entity_id] = EntityMetadata.from_state(state)
+        return metadata
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start listening for changes that invalidate the cache."""
+        unsub_state = async_track_state_change_event(
+            self.hass, self.entity_ids, self._async_state_changed
+        )
+        unsub_registry = self.hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated
+        )
+
+        @callback
+        def unsub() -> None:
+            unsub_state()
+            unsub_registry()
+
+        return unsub
+
+    @callback
+    def _async_state_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Drop the metadata when a projected attribute changed."""
+        entity_id = event.data["entity_id"]
+        if entity_id not in self._metadata:
+            return
+
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+        if old_state is None or new_state is None:
+            self._metadata.pop(entity_id, None)
+            return
+
+        # Unchanged attributes are shared between states
+        if old_state.attributes is new_state.attributes:
+            return
+        if _projection(old_state) != _projection(new_state):
+            self._metadata.pop(entity_id, None)
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        """Drop the metadata of an updated registry entry."""
+        self._metadata.pop(event.data["entity_id"], None)
+        if old_entity_id := event.data.get("old_entity_id"):
+            self._metadata.pop(old_entity_id, None)
@@ -0,0 +1,97 @@
+"""Performance metrics for TRMNL webhooks."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+# Phases of a refresh, in order
+PHASE_COLLECTION = "collection"
+PHASE_HISTORY = "history"
+PHASE_SERIALIZATION = "serialization"
+PHASE_HTTP = "http"
+PHASE_TOTAL = "total"
+PHASES = (PHASE_COLLECTION, PHASE_HISTORY, PHASE_SERIALIZATION, PHASE_HTTP, PHASE_TOTAL)
+
+# Number of refreshes kept for the rolling percentiles
+ROLLING_WINDOW = 100
+PERCENTILES = (50, 90, 99)
+
+
+class RefreshMetrics:
+    """Timings and counters of the refreshes of one webhook.
+
+    Durations are in milliseconds.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.durations: dict[str, float] = {}
+        self.payload_size = 0
+        self.bytes_saved = 0
+        self.retry_count = 0
+        self.skipped_count = 0
+        self.entity_samples: dict[str, int] = {}
+        self._current: dict[str, float] = {}
+        self._started = 0.0
+        self._rolling: dict[str, deque[float]] = {
+            phase: deque(maxlen=ROLLING_WINDOW) for phase in PHASES
+        }
+
+    def start(self) -> None:
+        """Start timing a refresh."""
+        self._current = dict.fromkeys(PHASES, 0.0)
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Add the time spent in the block to a phase of the current refresh."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[phase] = self._current.get(phase, 0.0) + (
+                time.perf_counter() - started
+            ) * 1000
+
+    def finish(self) -> None:
+        """Finish timing a refresh and add it to the rolling window."""
+        if not self._current:
+            return
+        self._current[PHASE_TOTAL] = (time.perf_counter() - self._started) * 1000
+        self.durations = self._current
+        self._current = {}
+        for phase, duration in self.durations.items():
+            self._rolling[phase].append(duration)
+
+    def percentiles(self) -> dict[str, dict[str, float]]:
+        """Return the rolling percentiles per phase."""
+        result = {}
+        for phase, durations in self._rolling.items():
+            if not durations:
+                continue
+            ordered = sorted(durations)
+            result[phase] = {
+                f"p{percentile}": round(
+                    ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)], 2
+                )
+                for percentile in PERCENTILES
+            }
+        return result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "last_durations_ms": {
+                phase: round(duration, 2) for phase, duration in self.durations.items()
+            },
+            "rolling_percentiles_ms": self.percentiles(),
+            "rolling_sample_count": len(self._rolling[PHASE_TOTAL]),
+            "payload_size": self.payload_size,
+            "bytes_saved": self.bytes_saved,
+            "retry_count": self.retry_count,
+            "skipped_count": self.skipped_count,
+            "entity_samples": self.entity_samples,
+        }
@@ -0,0 +1,437 @@
+"""Payload size handling for TRMNL."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import copy
+import hashlib
+import json
+import math
+from typing import Any
+
+from .const import (
+    STAT_AVG,
+    STAT_DELTA,
+    STAT_INTEGRAL,
+    STAT_LAST,
+    STAT_MAX,
+    STAT_MIN,
+    STAT_RATE,
+    STAT_SUM,
+    STAT_TODAY,
+)
+
+# Short keys used when the payload does not fit otherwise
+SHORT_KEYS = {
+    "entity_id": "id",
+    "name": "n",
+    "current": "c",
+    "last_changed": "lc",
+    "icon": "i",
+    "device_class": "dc",
+    "unit": "u",
+    "24h_avg": "avg",
+    "24h_min": "min",
+    "24h_max": "max",
+    "24h_last_value": "lv",
+    "24h_delta": "d",
+    "24h_sum": "sum",
+    "24h_integral": "int",
+    "24h_rate": "r",
+    "today_delta": "td",
+    "recent_data": "rd",
+    "24h_states": "st",
+    "24h_changes": "chg",
+    "24h_last": "lt",
+    "time": "t",
+    "value": "v",
+}
+
+# Payload key of each statistic
+STAT_PAYLOAD_KEYS = {
+    STAT_AVG: "24h_avg",
+    STAT_MIN: "24h_min",
+    STAT_MAX: "24h_max",
+    STAT_LAST: "24h_last_value",
+    STAT_DELTA: "24h_delta",
+    STAT_SUM: "24h_sum",
+    STAT_INTEGRAL: "24h_integral",
+    STAT_RATE: "24h_rate",
+    STAT_TODAY: "today_delta",
+}
+STAT_KEYS = tuple(STAT_PAYLOAD_KEYS.values())
+
+# Compact format: decimals used when the state does not show them, and the
+# most decimals kept
+DEFAULT_DECIMALS = 2
+MAX_DECIMALS = 3
+
+# Merge variables that change on every update without new data
+VOLATILE_KEYS = ("last_update",)
+
+
+def payload_size(payload: Any) -> int:
+    """Return the serialized size of (part of) a payload in bytes."""
+    # json.dumps escapes non-ASCII characters, so characters equal bytes
+    return len(json.dumps(payload))
+
+
+class PayloadSerializer:
+    """Serialize payloads from cached per-entity JSON fragments.
+
+    The fragment of an entity is kept with the entity it was serialized
+    from and only serialized again when the entity changed, so unchanged
+    entities are not serialized on every refresh. Entity objects reused
+    between builds are recognized by identity, without comparing their
+    contents. The body is assembled
+    from the fragments with the separators of json.dumps, so its size
+    equals payload_size().
+    """
+
+    def __init__(self) -> None:
+        """Initialize the serializer."""
+        self._fragments: dict[str, tuple[dict[str, Any], str]] = {}
+
+    def fragment(self, entity: dict[str, Any]) -> str:
+        """Return the JSON of an entity, serializing it only when it changed."""
+        key = _entity_key(entity)
+        if (cached := self._fragments.get(key)) is not None and (
+            cached[0] is entity or cached[0] == entity
+        ):
+            return cached[1]
+        fragment = json.dumps(entity)
+        self._fragments[key] = (entity, fragment)
+        return fragment
+
+    def entity_size(self, entity: dict[str, Any]) -> int:
+        """Return the serialized size of an entity in bytes."""
+        return len(self.fragment(entity))
+
+    def serialize(self, payload: dict[str, Any]) -> tuple[bytes, str]:
+        """Return the body of a payload and the hash of its content.
+
+        The hash ignores volatile fields, so it only changes with the content.
+        """
+        parts = []
+        content_parts = []
+        for key, value in payload["merge_variables"].items():
+            if isinstance(value, list):
+                part = f"{json.dumps(key)}: [{', '.join(map(self.fragment, value))}]"
+            else:
+                part = f"{json.dumps(key)}: {json.dumps(value)}"
+            parts.append(part)
+            if key not in VOLATILE_KEYS:
+                content_parts.append(part)
+        body = f'{{"merge_variables": {{{", ".join(parts)}}}}}'.encode()
+        content_hash = hashlib.sha256(", ".join(content_parts).encode()).hexdigest()
+        return body, content_hash
+
+
+def state_decimals(state: str) -> int:
+    """Return the decimals a numeric state is reported with."""
+    try:
+        float(state)
+    except ValueError:
+        return DEFAULT_DECIMALS
+    _, _, fraction = state.partition(".")
+    return min(len(fraction), MAX_DECIMALS)
+
+
+def trim_number(value: float, decimals: int) -> float | int:
+    """Round a number for the compact format, dropping a zero fraction."""
+    value = round(float(value), decimals)
+    return int(value) if value.is_integer() else value
+
+
+def compact_entity(entity: dict[str, Any]) -> dict[str, Any]:
+    """Convert an entity to the compact format.
+
+    Keys are shortened, a numeric current state becomes a number and recent
+    data becomes a time column and a value column.
+    """
+    compact = {}
+    for key, value in entity.items():
+        if key == "current":
+            try:
+                number = float(value)
+            except ValueError:
+                pass
+            else:
+                if math.isfinite(number):
+                    value = int(number) if number.is_integer() else number
+        elif key == "recent_data":
+            value = {
+                "t": [point["time"] for point in value],
+                "v": [point["value"] for point in value],
+            }
+        compact[SHORT_KEYS.get(key, key)] = value
+    return compact
+
+
+def _drop_key(key: str) -> Callable[[dict[str, Any]], dict[str, Any] | None]:
+    """Return a reduction that removes a key from an entity."""
+
+    def reduce(entity: dict[str, Any]) -> dict[str, Any] | None:
+        if key not in entity:
+            return None
+        return {k: v for k, v in entity.items() if k != key}
+
+    return reduce
+
+
+def _round_value(value: str) -> str:
+    """Round a formatted number to one decimal."""
+    try:
+        return f"{float(value):.1f}"
+    except ValueError:
+        return value
+
+
+def _reduce_precision(entity: dict[str, Any]) -> dict[str, Any] | None:
+    """Round statistics and recent data values to one decimal."""
+    if not any(key in entity for key in (*STAT_KEYS, "recent_data")):
+        return None
+
+    reduced = dict(entity)
+    for key in STAT_KEYS:
+        if key in reduced:
+            reduced[key] = _round_value(reduced[key])
+    if "recent_data" in reduced:
+        reduced["recent_data"] = [
+            {**point, "value": _round_value(point["value"])}
+            for point in reduced["recent_data"]
+        ]
+    return reduced
+
+
+def _downsample_recent_data(entity: dict[str, Any]) -> dict[str, Any] | None:
+    """Keep every other recent data point, always including the latest."""
+    if len(entity.get("recent_data", ())) < 3:
+        return None
+    return {**entity, "recent_data": entity["recent_data"][::-1][::2][::-1]}
+
+
+def _shorten_keys(entity: dict[str, Any]) -> dict[str, Any] | None:
+    """Replace the entity keys with their short versions."""
+    reduced = {}
+    for key, value in entity.items():
+        if key == "recent_data":
+            value = [
+                {SHORT_KEYS.get(k, k): v for k, v in point.items()} for point in value
+            ]
+        reduced[SHORT_KEYS.get(key, key)] = value
+    return reduced
+
+
+def _reduce_compact_precision(entity: dict[str, Any]) -> dict[str, Any] | None:
+    """Round compact statistics and recent data values to one decimal."""
+    stat_keys = [SHORT_KEYS[key] for key in STAT_KEYS if SHORT_KEYS[key] in entity]
+    if not stat_keys and "rd" not in entity:
+        return None
+
+    reduced = dict(entity)
+    for key in stat_keys:
+        reduced[key] = trim_number(reduced[key], 1)
+    if "rd" in reduced:
+        reduced["rd"] = {
+            "t": reduced["rd"]["t"],
+            "v": [trim_number(value, 1) for value in reduced["rd"]["v"]],
+        }
+    return reduced
+
+
+def _downsample_compact_recent_data(entity: dict[str, Any]) -> dict[str, Any] | None:
+    """Keep every other compact recent data point, always including the latest."""
+    if len(entity.get("rd", {}).get("t", ())) < 3:
+        return None
+    return {
+        **entity,
+        "rd": {
+            column: values[::-1][::2][::-1]
+            for column, values in entity["rd"].items()
+        },
+    }
+
+
+# Reductions in order of preference: (name, reduction, repeatable, all entities)
+REDUCTIONS: list[
+    tuple[str, Callable[[dict[str, Any]], dict[str, Any] | None], bool, bool]
+] = [
+    ("drop_icon", _drop_key("icon"), False, False),
+    ("drop_device_class", _drop_key("device_class"), False, False),
+    ("reduce_precision", _reduce_precision, False, False),
+    ("downsample_recent_data", _downsample_recent_data, True, False),
+    ("drop_recent_data", _drop_key("recent_data"), False, False),
+    ("drop_state_last_changed", _drop_key("24h_last"), False, False),
+    ("drop_last_changed", _drop_key("last_changed"), False, False),
+    # Templates have to match the keys, so shorten them everywhere or nowhere
+    ("shorten_keys", _shorten_keys, False, True),
+]
+
+# Reductions of the compact format, which already uses the short keys
+COMPACT_REDUCTIONS: list[
+    tuple[str, Callable[[dict[str, Any]], dict[str, Any] | None], bool, bool]
+] = [
+    ("drop_icon", _drop_key("i"), False, False),
+    ("drop_device_class", _drop_key("dc"), False, False),
+    ("reduce_precision", _reduce_compact_precision, False, False),
+    ("downsample_recent_data", _downsample_compact_recent_data, True, False),
+    ("drop_recent_data", _drop_key("rd"), False, False),
+    ("drop_state_last_changed", _drop_key("lt"), False, False),
+    ("drop_last_changed", _drop_key("lc"), False, False),
+]
+
+
+def _entity_key(entity: dict[str, Any]) -> str:
+    """Return the payload id of an entity in the full or the compact format."""
+    return entity["entity_id"] if "entity_id" in entity else entity["id"]
+
+
+def shard_payload(
+    payload: dict[str, Any],
+    max_size: int,
+    shard_count: int,
+    previous: dict[str, int] | None = None,
+    entity_size: Callable[[dict[str, Any]], int] = payload_size,
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Split a payload into shard_count pages of at most max_size bytes.
+
+    The entities are bin-packed on their serialized size, largest first.
+    An entity stays on the page it was on before (previous maps payload ids
+    to pages) as long as it fits there, so screens don't reshuffle on every
+    update; other entities go to the first page with room, or the emptiest
+    page when none has room. Entities keep their group and order, and every
+    page gets "page" and "pages" merge variables. Returns the pages and the
+    page of every entity. entity_size can measure entities from a cache.
+    """
+    if shard_count <= 1:
+        return [payload], {}
+
+    merge_variables = payload["merge_variables"]
+    header = {
+        key: value for key, value in merge_variables.items() if not isinstance(value, list)
+    }
+    groups = {
+        key: value for key, value in merge_variables.items() if isinstance(value, list)
+    }
+
+    # Room left for entities when every group shows up on every page
+    capacity = (
+        max_size
+        - payload_size(
+            {"merge_variables": {**header, "page": shard_count, "pages": shard_count}}
+        )
+        - sum(payload_size(group) + 6 for group in groups)
+    )
+    # Every entity also takes a ", " separator
+    sizes = {
+        _entity_key(entity): entity_size(entity) + 2
+        for entities in groups.values()
+        for entity in entities
+    }
+    order = sorted(sizes, key=lambda key: sizes[key], reverse=True)
+
+    loads = [0] * shard_count
+    assignment: dict[str, int] = {}
+    for key in order:
+        shard = (previous or {}).get(key)
+        if shard is not None and shard < shard_count and loads[shard] + sizes[key] <= capacity:
+            assignment[key] = shard
+            loads[shard] += sizes[key]
+    for key in order:
+        if key in assignment:
+            continue
+        shard = next(
+            (
+                index
+                for index, load in enumerate(loads)
+                if load + sizes[key] <= capacity
+            ),
+            loads.index(min(loads)),
+        )
+        assignment[key] = shard
+        loads[shard] += sizes[key]
+
+    pages: list[dict[str, Any]] = [
+        {"merge_variables": {**header, "page": index + 1, "pages": shard_count}}
+        for index in range(shard_count)
+    ]
+    for group, entities in groups.items():
+        for entity in entities:
+            pages[assignment[_entity_key(entity)]]["merge_variables"].setdefault(
+                group, []
+            ).append(entity)
+
+    return pages, assignment
+
+
+def fit_payload(
+    payload: dict[str, Any],
+    max_size: int,
+    size: int | None = None,
+    reductions: list[
+        tuple[str, Callable[[dict[str, Any]], dict[str, Any] | None], bool, bool]
+    ] = REDUCTIONS,
+    entity_size: Callable[[dict[str, Any]], int] = payload_size,
+) -> tuple[dict[str, Any], int, list[str]]:
+    """Progressively reduce a payload until it fits in max_size bytes.
+
+    Reductions are applied per entity, largest measured saving first. Only
+    the changed entity is serialized again, the total size is updated with
+    the difference. Returns the (possibly reduced) payload, its size and
+    the reductions that were applied. The size of the payload can be passed
+    in when it is already known; compact payloads pass COMPACT_REDUCTIONS.
+    entity_size can measure the unreduced entities from a cache.
+    """
+    if size is None:
+        size = payload_size(payload)
+    if size <= max_size:
+        return payload, size, []
+
+    # Measure the entities before copying, so a cache recognizes them
+    sizes = [
+        entity_size(entity)
+        for value in payload["merge_variables"].values()
+        if isinstance(value, list)
+        for entity in value
+    ]
+    payload = copy.deepcopy(payload)
+    entities = [
+        entity
+        for value in payload["merge_variables"].values()
+        if isinstance(value, list)
+        for entity in value
+    ]
+    applied: dict[str, int] = {}
+
+    for name, reduce, repeatable, all_entities in reductions:
+        while size > max_size:
+            # Measure what the reduction saves for every entity
+            candidates = []
+            for index, entity in enumerate(entities):
+                if (reduced := reduce(entity)) is None:
+                    continue
+                reduced_size = payload_size(reduced)
+                if reduced_size < sizes[index] or all_entities:
+                    candidates.append((sizes[index] - reduced_size, index, reduced, reduced_size))
+
+            if not candidates:
+                break
+
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            for _, index, reduced, reduced_size in candidates:
+                # Update in place so the grouped lists see the change
+                entities[index].clear()
+                entities[index].update(reduced)
+                size += reduced_size - sizes[index]
+                sizes[index] = reduced_size
+                applied[name] = applied.get(name, 0) + 1
+                if size <= max_size and not all_entities:
+                    break
+
+            if not repeatable:
+                break
+
+        if size <= max_size:
+            break
+
+    return payload, size, [f"{name} ({count}x)" for name, count in applied.items()]
@@ -0,0 +1,102 @@
+"""Update scheduling for TRMNL."""
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+import hashlib
+
+from homeassistant.util import dt as dt_util
+
+from .const import MAX_SCHEDULE_JITTER
+
+
+def entry_jitter(entry_id: str) -> timedelta:
+    """Return the fixed schedule offset of a config entry.
+
+    Derived from the entry ID, so it is the same after every restart but
+    spreads the entries over MAX_SCHEDULE_JITTER seconds.
+    """
+    digest = int(hashlib.sha256(entry_id.encode()).hexdigest(), 16)
+    return timedelta(milliseconds=digest % (MAX_SCHEDULE_JITTER * 1000))
+
+
+def in_quiet_hours(moment: time, start: time | None, end: time | None) -> bool:
+    """Return True if a time of day falls in the quiet hours.
+
+    The quiet hours can span midnight (e.g. 23:00-06:00).
+    """
+    if start is None or end is None or start == end:
+        return False
+    if start < end:
+        return start <= moment < end
+    return moment >= start or moment < end
+
+
+def next_refresh(
+    now: datetime,
+    interval: timedelta,
+    *,
+    aligned: bool = False,
+    lead_time: timedelta = timedelta(0),
+    jitter: timedelta = timedelta(0),
+    quiet_start: time | None = None,
+    quiet_end: time | None = None,
+) -> datetime:
+    """Return when the next scheduled refresh should run.
+
+    Aligned refreshes tick on the wall clock at multiples of the interval
+    since local midnight (e.g. :00, :15, :30, :45), and run lead_time plus
+    jitter before the tick so the data is there when the device refreshes.
+    Otherwise the next refresh is one interval from now. A tick that falls
+    in the quiet hours moves to the end of the quiet hours, or the first
+    aligned tick after it.
+
+    The ticks are counted in UTC from midnight, so the repeated hour of a
+    DST change gets its ticks too.
+    """
+    now = dt_util.as_utc(now)
+
+    def is_quiet(moment: datetime) -> bool:
+        return in_quiet_hours(dt_util.as_local(moment).time(), quiet_start, quiet_end)
+
+    if not aligned:
+        tick = now + interval
+        if is_quiet(tick):
+            return _end_of_quiet_hours(tick, quiet_end)
+        return tick
+
+    offset = lead_time + jitter
+    tick = _next_aligned_tick(now + offset, interval)
+    if is_quiet(tick):
+        end = _end_of_quiet_hours(tick, quiet_end)
+        tick = _next_aligned_tick(end - timedelta(microseconds=1), interval)
+        # Every tick can be quiet (e.g. a daily tick at midnight), the
+        # refresh then runs at the end of the quiet hours
+        if is_quiet(tick):
+            return end
+
+    # The refresh of the first tick after the quiet hours waits for their end
+    refresh = tick - offset
+    if is_quiet(refresh):
+        return _end_of_quiet_hours(refresh, quiet_end)
+    return refresh
+
+
+def _next_aligned_tick(moment: datetime, interval: timedelta) -> datetime:
+    """Return the first tick after moment at a multiple of interval since midnight."""
+    local = dt_util.as_local(moment)
+    midnight = dt_util.as_utc(dt_util.start_of_local_day(local))
+    next_midnight = dt_util.as_utc(
+        dt_util.start_of_local_day(local.date() + timedelta(days=1))
+    )
+    return min(
+        midnight + interval * ((moment - midnight) // interval + 1), next_midnight
+    )
+
+
+def _end_of_quiet_hours(moment: datetime, quiet_end: time) -> datetime:
+    """Return the end (in UTC) of the quiet hours that moment falls in."""
+    local = dt_util.as_local(moment)
+    end = datetime.combine(local.date(), quiet_end, local.tzinfo)
+    if end <= local:
+        end = datetime.combine(local.date() + timedelta(days=1), quiet_end, local.tzinfo)
+    return dt_util.as_utc(end)
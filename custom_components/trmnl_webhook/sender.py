@@ -0,0 +1,301 @@
+"""Integration-wide sender for TRMNL webhooks."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+import logging
+import math
+import random
+from typing import Any
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_SENDER = f"{DOMAIN}_sender"
+
+# Spacing between two sends across all webhooks, so entries with the same
+# interval do not all hit TRMNL at the same moment
+SEND_SPACING = 1.0  # seconds
+MAX_CONCURRENT_SENDS_PER_HOST = 2
+SEND_TIMEOUT = 10  # seconds
+
+# Retries within one send
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0  # seconds, doubled on every attempt
+# A longer Retry-After is not waited for inline but opens the circuit instead
+MAX_INLINE_RETRY_AFTER = 30  # seconds
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Circuit breaker
+FAILURE_THRESHOLD = 3  # failed sends before the circuit opens
+RESET_TIMEOUT = 60  # seconds before the first half-open probe
+MAX_RESET_TIMEOUT = 3600  # seconds
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+BREAKER_STATES = [STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN]
+
+
+class TRMNLSendError(Exception):
+    """Error sending a payload to TRMNL."""
+
+
+@callback
+def async_get_sender(hass: HomeAssistant) -> TRMNLSender:
+    """Return the sender shared by all config entries."""
+    if (sender := hass.data.get(DATA_SENDER)) is None:
+        sender = hass.data[DATA_SENDER] = TRMNLSender(hass)
+    return sender
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (seconds or HTTP date) to seconds.
+
+    The delay is capped at MAX_RESET_TIMEOUT so a bogus header can't
+    overflow the timedelta or stop the sends for days.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        if not math.isfinite(seconds):
+            return None
+        return min(max(0.0, seconds), MAX_RESET_TIMEOUT)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=dt_util.UTC)
+    seconds = (retry_at - dt_util.utcnow()).total_seconds()
+    return min(max(0.0, seconds), MAX_RESET_TIMEOUT)
+
+
+class CircuitBreaker:
+    """Circuit breaker for the sends of one webhook.
+
+    After FAILURE_THRESHOLD failed sends in a row the circuit opens and no
+    sends are attempted until the reset timeout (or a longer Retry-After)
+    has passed. The circuit is then half-open: the next send is a probe
+    that closes the circuit on success or opens it again, with a doubled
+    timeout, on failure. Other sends are refused while the probe runs.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the circuit breaker."""
+        self.failures = 0
+        self.open_until: datetime | None = None
+        self._reset_timeout = RESET_TIMEOUT
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Return the current state of the circuit."""
+        if self.open_until is None:
+            return STATE_CLOSED
+        if dt_util.utcnow() < self.open_until:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Return True if a send may be attempted.
+
+        A send allowed while the circuit is half-open is the probe; it has
+        to end with record_success, record_failure or end_probe.
+        """
+        state = self.state
+        if state == STATE_HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return state == STATE_CLOSED
+
+    def end_probe(self) -> None:
+        """Let the next send probe the circuit, e.g. after a cancelled probe."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful send."""
+        self._probing = False
+        self.failures = 0
+        self.open_until = None
+        self._reset_timeout = RESET_TIMEOUT
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        """Count a failed send and open the circuit when needed."""
+        self._probing = False
+        half_open = self.state == STATE_HALF_OPEN
+        self.failures += 1
+
+        if half_open:
+            # The probe failed, back off further
+            self._reset_timeout = min(self._reset_timeout * 2, MAX_RESET_TIMEOUT)
+            timeout = max(self._reset_timeout, retry_after or 0)
+        elif self.failures >= FAILURE_THRESHOLD:
+            timeout = max(self._reset_timeout, retry_after or 0)
+        elif retry_after is not None:
+            # Respect the server asking to wait
+            timeout = retry_after
+        else:
+            return
+
+        self.open_until = dt_util.utcnow() + timedelta(seconds=timeout)
+        _LOGGER.warning(
+            "Circuit opened after %d failed sends, next attempt after %s",
+            self.failures,
+            self.open_until,
+        )
+
+
+class TRMNLSender:
+    """Send payloads to TRMNL over Home Assistant's shared HTTP session.
+
+    Sends of all config entries are queued in order of arrival and spread
+    out by SEND_SPACING, with a limit on concurrent requests per host. The
+    shared session keeps connections alive between sends.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the sender."""
+        self.hass = hass
+        self._session = async_get_clientsession(hass)
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._next_slot = 0.0
+
+    async def async_post(self, url: str, payload: dict[str, Any]) -> int:
+        """Post a payload once and return the response status.
+
+        Raises TRMNLSendError for connection errors and error responses.
+        """
+        try:
+            status, _ = await self._async_request(url, payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise TRMNLSendError(str(err) or type(err).__name__) from err
+        if status >= 400:
+            raise TRMNLSendError(f"HTTP status {status}")
+        return status
+
+    async def async_send(
+        self,
+        url: str,
+        payload: dict[str, Any] | bytes,
+        breaker: CircuitBreaker,
+        on_retry: Callable[[], None] | None = None,
+    ) -> None:
+        """Post a payload with retries, updating the circuit breaker.
+
+        The payload can be serialized already, its bytes are then sent as is.
+        Retries wait for the Retry-After of the response, or back off
+        exponentially with jitter. Raises TRMNLSendError when all attempts
+        failed, or when the circuit breaker refuses the send.
+        """
+        probe = breaker.state == STATE_HALF_OPEN
+        if not breaker.allow_request():
+            raise TRMNLSendError(
+                f"TRMNL webhook unavailable, next attempt after {breaker.open_until}"
+            )
+        try:
+            await self._async_send(url, payload, breaker, on_retry)
+        finally:
+            # Also free the probe when the send was cancelled
+            if probe:
+                breaker.end_probe()
+
+    async def _async_send(
+        self,
+        url: str,
+        payload: dict[str, Any] | bytes,
+        breaker: CircuitBreaker,
+        on_retry: Callable[[], None] | None,
+    ) -> None:
+        """Post a payload with retries, once the circuit breaker allowed it."""
+        for attempt in range(MAX_ATTEMPTS):
+            retry_after = None
+            try:
+                status, retry_after = await self._async_request(url, payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                error = str(err) or type(err).__name__
+            else:
+                if status < 400:
+                    breaker.record_success()
+                    return
+                error = f"HTTP status {status}"
+                if status not in RETRYABLE_STATUSES:
+                    breaker.record_failure()
+                    raise TRMNLSendError(error)
+
+            if attempt == MAX_ATTEMPTS - 1 or (
+                retry_after is not None and retry_after > MAX_INLINE_RETRY_AFTER
+            ):
+                breaker.record_failure(retry_after)
+                raise TRMNLSendError(
+                    f"Failed to send to TRMNL after {attempt + 1} attempts: {error}"
+                )
+
+            if retry_after is None:
+                # Exponential backoff with jitter
+                delay = RETRY_BASE_DELAY * 2**attempt
+                retry_after = random.uniform(delay / 2, delay)
+
+            _LOGGER.warning(
+                "Failed to send to TRMNL (attempt %d/%d): %s. Retrying in %.1fs...",
+                attempt + 1,
+                MAX_ATTEMPTS,
+                error,
+                retry_after,
+            )
+            if on_retry:
+                on_retry()
+            await asyncio.sleep(retry_after)
+
+    async def _async_request(
+        self, url: str, payload: dict[str, Any] | bytes
+    ) -> tuple[int, float | None]:
+        """Post a payload and return the status and Retry-After in seconds."""
+        host = urlsplit(url).hostname or ""
+        if (limit := self._host_limits.get(host)) is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(
+                MAX_CONCURRENT_SENDS_PER_HOST
+            )
+
+        await self._async_wait_for_slot()
+
+        # Serialized payloads are posted as is instead of dumped again
+        if isinstance(payload, bytes):
+            content: dict[str, Any] = {"data": payload, "headers": JSON_HEADERS}
+        else:
+            content = {"json": payload}
+
+        async with limit, self._session.post(
+            url,
+            **content,
+            timeout=aiohttp.ClientTimeout(total=SEND_TIMEOUT),
+        ) as response:
+            return response.status, _parse_retry_after(
+                response.headers.get("Retry-After")
+            )
+
+    async def _async_wait_for_slot(self) -> None:
+        """Wait for the next free send slot."""
+        now = self.hass.loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + SEND_SPACING
+        if slot > now:
+            await asyncio.sleep(slot - now)
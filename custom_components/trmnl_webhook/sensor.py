@@ -0,0 +1,154 @@
+"""Sensor platform for TRMNL Webhook diagnostics."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import TRMNLCoordinator
+from .entity import webhook_device_info
+from .metrics import (
+    PHASE_COLLECTION,
+    PHASE_HISTORY,
+    PHASE_HTTP,
+    PHASE_SERIALIZATION,
+    PHASE_TOTAL,
+)
+from .sender import BREAKER_STATES
+
+
+@dataclass(frozen=True, kw_only=True)
+class TRMNLSensorEntityDescription(SensorEntityDescription):
+    """Describes a TRMNL diagnostics sensor."""
+
+    name_suffix: str
+    value_fn: Callable[[TRMNLCoordinator], float | int | str | None]
+
+
+def _duration(phase: str) -> Callable[[TRMNLCoordinator], float | None]:
+    """Return a value function for the last duration of a refresh phase."""
+
+    def value(coordinator: TRMNLCoordinator) -> float | None:
+        if (duration := coordinator.metrics.durations.get(phase)) is None:
+            return None
+        return round(duration, 1)
+
+    return value
+
+
+SENSORS: tuple[TRMNLSensorEntityDescription, ...] = (
+    *(
+        TRMNLSensorEntityDescription(
+            key=f"{phase}_duration",
+            name_suffix=name_suffix,
+            icon="mdi:timer-outline",
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            value_fn=_duration(phase),
+        )
+        for phase, name_suffix in (
+            (PHASE_TOTAL, "Last refresh duration"),
+            (PHASE_COLLECTION, "Collection duration"),
+            (PHASE_HISTORY, "History query duration"),
+            (PHASE_SERIALIZATION, "Serialization duration"),
+            (PHASE_HTTP, "HTTP duration"),
+        )
+    ),
+    TRMNLSensorEntityDescription(
+        key="payload_size",
+        name_suffix="Payload size",
+        icon="mdi:file-outline",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        value_fn=lambda coordinator: coordinator.metrics.payload_size,
+    ),
+    TRMNLSensorEntityDescription(
+        key="bytes_saved",
+        name_suffix="Bytes saved by compaction",
+        icon="mdi:arrow-collapse-vertical",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        value_fn=lambda coordinator: coordinator.metrics.bytes_saved,
+    ),
+    TRMNLSensorEntityDescription(
+        key="retry_count",
+        name_suffix="Retries",
+        icon="mdi:repeat",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.metrics.retry_count,
+    ),
+    TRMNLSensorEntityDescription(
+        key="skipped_count",
+        name_suffix="Skipped unchanged",
+        icon="mdi:skip-next-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.metrics.skipped_count,
+    ),
+    TRMNLSensorEntityDescription(
+        key="circuit_breaker",
+        name_suffix="Circuit breaker",
+        icon="mdi:electric-switch",
+        device_class=SensorDeviceClass.ENUM,
+        options=BREAKER_STATES,
+        value_fn=lambda coordinator: coordinator.breaker.state,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up TRMNL diagnostics sensor entities."""
+    coordinator: TRMNLCoordinator = hass.data[DOMAIN][entry.entry_id]
+    
+    async_add_entities(
+        TRMNLDiagnosticsSensor(coordinator, entry, description)
+        for description in SENSORS
+    )
+
+
+class TRMNLDiagnosticsSensor(CoordinatorEntity[TRMNLCoordinator], SensorEntity):
+    """Sensor exposing performance metrics of a TRMNL webhook."""
+
+    entity_description: TRMNLSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: TRMNLCoordinator,
+        entry: ConfigEntry,
+        description: TRMNLSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_name = f"{entry.title} {description.name_suffix}"
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = webhook_device_info(entry)
+
+    @property
+    def available(self) -> bool:
+        """Return True, metrics are also meaningful after a failed refresh."""
+        return True
+
+    @property
+    def native_value(self) -> float | int | str | None:
+        """Return the metric value."""
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,20 @@
+"""Fixtures for the TRMNL tests."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from homeassistant.util import dt as dt_util
+
+TIME_ZONE = ZoneInfo("Europe/Amsterdam")
+
+
+@pytest.fixture(autouse=True)
+def time_zone() -> Iterator[ZoneInfo]:
+    """Run every test in a time zone with DST."""
+    default = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(TIME_ZONE)
+    yield TIME_ZONE
+    dt_util.set_default_time_zone(default)
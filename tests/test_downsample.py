@@ -0,0 +1,59 @@
+"""Tests for the downsampling of recent data points."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.trmnl_webhook.const import (
+    DOWNSAMPLE_LTTB,
+    DOWNSAMPLE_MEAN,
+    DOWNSAMPLE_MINMAX,
+)
+from custom_components.trmnl_webhook.downsample import downsample
+
+SAMPLES = [(0.0, 1.0), (5.0, 9.0), (8.0, 3.0)]
+
+
+@pytest.mark.parametrize("method", [DOWNSAMPLE_LTTB, DOWNSAMPLE_MINMAX])
+def test_single_point_is_the_newest_sample(method: str) -> None:
+    """Test one point is the newest sample."""
+    assert downsample(SAMPLES, 1, method, 0, 10) == [(8.0, 3.0)]
+
+
+@pytest.mark.parametrize("method", [DOWNSAMPLE_LTTB, DOWNSAMPLE_MINMAX])
+def test_single_point_without_samples_in_window(method: str) -> None:
+    """Test one point without samples in the window is the state in effect."""
+    assert downsample([(-1.0, 4.0)], 1, method, 0, 10) == [(0, 4.0)]
+
+
+def test_single_mean_point() -> None:
+    """Test one mean point averages the window."""
+    assert downsample(SAMPLES, 1, DOWNSAMPLE_MEAN, 0, 10) == [(0, 13 / 3)]
+
+
+def test_minmax_pairs() -> None:
+    """Test min/max keeps the lowest and highest sample per bucket."""
+    assert downsample(SAMPLES, 2, DOWNSAMPLE_MINMAX, 0, 10) == [(0.0, 1.0), (5.0, 9.0)]
+
+
+def test_empty_buckets_repeat_the_value() -> None:
+    """Test buckets without samples repeat the value in effect."""
+    assert downsample([(0.0, 2.0)], 2, DOWNSAMPLE_MEAN, 0, 10) == [
+        (0, 2.0),
+        (5.0, 2.0),
+    ]
+
+
+def test_lttb_keeps_first_and_last() -> None:
+    """Test LTTB keeps the first sample and the newest sample."""
+    samples = [(float(ts), float(ts % 3)) for ts in range(10)]
+    points = downsample(samples, 4, DOWNSAMPLE_LTTB, 0, 10)
+
+    assert len(points) == 4
+    assert points[0] == samples[0]
+    assert points[-1] == samples[-1]
+
+
+@pytest.mark.parametrize("num_points", [0, -1])
+def test_no_points(num_points: int) -> None:
+    """Test no points are returned when none are requested."""
+    assert downsample(SAMPLES, num_points, DOWNSAMPLE_LTTB, 0, 10) == []
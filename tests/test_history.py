@@ -0,0 +1,98 @@
+"""Tests for the history aggregation."""
+from __future__ import annotations
+
+from collections import deque
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.trmnl_webhook.history import (
+    HistoryAggregator,
+    HistoryCache,
+    StateDurationAggregator,
+    samples_since,
+)
+
+
+def test_aggregator_statistics() -> None:
+    """Test the time-weighted statistics of a window."""
+    aggregate = HistoryAggregator(recent_points=2)
+    aggregate.add_samples([(0.0, 1.0), (10.0, 3.0), (20.0, 2.0)])
+    aggregate.close(40.0)
+
+    assert aggregate.count == 3
+    assert aggregate.minimum == 1.0
+    assert aggregate.maximum == 3.0
+    assert aggregate.first == 1.0
+    assert aggregate.last == 2.0
+    assert aggregate.total == 6.0
+    assert aggregate.mean == pytest.approx((1 * 10 + 3 * 10 + 2 * 20) / 40)
+    assert aggregate.delta == 1.0
+    assert aggregate.integral == pytest.approx((20 + 25 + 40) / 3600)
+    assert aggregate.rate == pytest.approx(1.0 / 40 * 3600)
+    assert list(aggregate.recent) == [(10.0, 3.0), (20.0, 2.0)]
+
+
+def test_aggregator_change_since_midnight() -> None:
+    """Test the change since midnight uses the value at midnight."""
+    aggregate = HistoryAggregator(midnight_ts=15.0)
+    aggregate.add_samples([(0.0, 1.0), (10.0, 3.0), (20.0, 7.0)])
+
+    assert aggregate.today_delta == 4.0
+
+
+def test_aggregator_skips_non_numeric_states() -> None:
+    """Test non-numeric states are left out of the statistics."""
+    aggregate = HistoryAggregator()
+    aggregate.add_samples([(0.0, 1.0), (5.0, "unavailable"), (10.0, 3.0)])
+
+    assert aggregate.count == 2
+    assert aggregate.minimum == 1.0
+
+
+def test_aggregator_pre_aggregated_rows() -> None:
+    """Test rows with their own min/max."""
+    aggregate = HistoryAggregator()
+    aggregate.add(0.0, 2.0, 1.0, 4.0)
+    aggregate.add(300.0, 3.0, 2.5, 3.5)
+
+    assert aggregate.minimum == 1.0
+    assert aggregate.maximum == 4.0
+
+
+def test_samples_since() -> None:
+    """Test the window includes the state active at its start."""
+    samples = deque([(0.0, 1.0), (10.0, 2.0), (20.0, 3.0)])
+
+    assert list(samples_since(samples, 15.0)) == [(15.0, 2.0), (20.0, 3.0)]
+    assert list(samples_since(samples, 10.0)) == [(10.0, 2.0), (20.0, 3.0)]
+    assert list(samples_since(samples, -5.0)) == list(samples)
+    assert list(samples_since(samples, 25.0)) == [(25.0, 3.0)]
+    assert list(samples_since(deque(), 25.0)) == []
+
+
+def test_state_durations() -> None:
+    """Test the time share per state."""
+    aggregate = StateDurationAggregator()
+    aggregate.add_samples([(0.0, "off"), (30.0, "on"), (40.0, "on"), (90.0, "off")])
+
+    assert aggregate.transitions == 2
+    assert aggregate.last_changed_to == {"on": 30.0, "off": 90.0}
+    assert aggregate.shares(100.0) == [("on", 0.6), ("off", 0.4)]
+
+
+def test_cache_keeps_non_finite_states_as_text() -> None:
+    """Test nan and inf states are not stored as numbers."""
+    cache = HistoryCache(MagicMock())
+    cache._merge(
+        ["sensor.power"],
+        {"sensor.power": [(1.0, "nan"), (2.0, "inf"), (3.0, "-inf"), (4.0, "5")]},
+        10.0,
+    )
+
+    assert list(cache._samples["sensor.power"]) == [
+        (1.0, "nan"),
+        (2.0, "inf"),
+        (3.0, "-inf"),
+        (4.0, 5.0),
+    ]
@@ -0,0 +1,139 @@
+"""Tests for the payload size handling."""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from custom_components.trmnl_webhook.payload import (
+    COMPACT_REDUCTIONS,
+    PayloadSerializer,
+    compact_entity,
+    fit_payload,
+    payload_size,
+    shard_payload,
+)
+
+
+def entity(index: int, points: int = 10) -> dict[str, Any]:
+    """Return a sensor in the full format."""
+    return {
+        "entity_id": f"sensor_s{index}",
+        "name": f"Sensor {index}",
+        "current": "21.5",
+        "last_changed": "2026-10-16 12:00:00",
+        "icon": "mdi:thermometer",
+        "device_class": "temperature",
+        "unit": "°C",
+        "24h_avg": "20.12",
+        "24h_min": "18.34",
+        "24h_max": "22.56",
+        "recent_data": [
+            {"time": f"{hour:02d}:00", "value": "20.12"} for hour in range(points)
+        ],
+    }
+
+
+def payload(count: int) -> dict[str, Any]:
+    """Return a payload with count sensors."""
+    return {
+        "merge_variables": {
+            "last_update": "2026-10-16 12:00:00",
+            "sensors": [entity(index) for index in range(count)],
+        }
+    }
+
+
+def test_serializer_matches_json_dumps() -> None:
+    """Test the assembled body equals json.dumps."""
+    body, _ = PayloadSerializer().serialize(payload(3))
+
+    assert json.loads(body) == payload(3)
+    assert len(body) == payload_size(payload(3))
+
+
+def test_serializer_hash_ignores_last_update() -> None:
+    """Test the content hash only changes with the content."""
+    serializer = PayloadSerializer()
+    changed = payload(2)
+    changed["merge_variables"]["last_update"] = "2026-10-16 13:00:00"
+
+    assert serializer.serialize(payload(2))[1] == serializer.serialize(changed)[1]
+    changed["merge_variables"]["sensors"][0]["current"] = "22.0"
+    assert serializer.serialize(payload(2))[1] != serializer.serialize(changed)[1]
+
+
+def test_fit_payload_that_fits() -> None:
+    """Test a payload that fits is returned as is."""
+    small = payload(1)
+
+    assert fit_payload(small, 2048) == (small, payload_size(small), [])
+
+
+def test_fit_payload_reduces_until_it_fits() -> None:
+    """Test a payload is reduced below the limit, leaving the input untouched."""
+    large = payload(8)
+    size = payload_size(large)
+    serializer = PayloadSerializer()
+
+    fitted, fitted_size, reductions = fit_payload(
+        large, 2048, size, entity_size=serializer.entity_size
+    )
+
+    assert size > 2048
+    assert fitted_size == payload_size(fitted) <= 2048
+    assert reductions
+    assert reductions[0].startswith("drop_icon")
+    assert payload_size(large) == size
+
+
+def test_fit_compact_payload() -> None:
+    """Test the compact reductions work on compact entities."""
+    large = payload(12)
+    large["merge_variables"]["sensors"] = [
+        compact_entity(sensor) for sensor in large["merge_variables"]["sensors"]
+    ]
+
+    fitted, fitted_size, _ = fit_payload(large, 2048, reductions=COMPACT_REDUCTIONS)
+
+    assert fitted_size == payload_size(fitted) <= 2048
+
+
+def test_compact_entity() -> None:
+    """Test the compact format shortens keys and makes columns."""
+    compact = compact_entity(entity(0, points=2))
+
+    assert compact["id"] == "sensor_s0"
+    assert compact["c"] == 21.5
+    assert compact["rd"] == {"t": ["00:00", "01:00"], "v": ["20.12", "20.12"]}
+
+
+def test_compact_entity_keeps_non_finite_state() -> None:
+    """Test a nan state is not turned into a number."""
+    assert compact_entity({**entity(0), "current": "nan"})["c"] == "nan"
+
+
+def test_shard_payload() -> None:
+    """Test every page fits and every entity is on one page."""
+    pages, assignment = shard_payload(payload(8), 2048, 3)
+
+    assert len(pages) == 3
+    assert all(payload_size(page) <= 2048 for page in pages)
+    assert [page["merge_variables"]["page"] for page in pages] == [1, 2, 3]
+    assert sorted(assignment) == [f"sensor_s{index}" for index in range(8)]
+    assert sum(len(page["merge_variables"].get("sensors", [])) for page in pages) == 8
+
+
+def test_shard_payload_keeps_assignment() -> None:
+    """Test entities stay on their previous page when it has room."""
+    previous = {f"sensor_s{index}": 2 - index % 3 for index in range(6)}
+
+    _, assignment = shard_payload(payload(6), 2048, 3, previous)
+
+    assert assignment == previous
+
+
+def test_shard_payload_single_webhook() -> None:
+    """Test a single webhook gets the payload as is."""
+    full = payload(2)
+
+    assert shard_payload(full, 2048, 1) == ([full], {})
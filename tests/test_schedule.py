@@ -0,0 +1,101 @@
+"""Tests for the update scheduling."""
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.trmnl_webhook.schedule import in_quiet_hours, next_refresh
+
+from .conftest import TIME_ZONE
+
+QUIET = {"quiet_start": time(23), "quiet_end": time(6)}
+
+
+def local(*args: int) -> datetime:
+    """Return a local time."""
+    return datetime(*args, tzinfo=TIME_ZONE)
+
+
+def test_quiet_hours_span_midnight() -> None:
+    """Test quiet hours that span midnight."""
+    assert in_quiet_hours(time(23, 30), time(23), time(6))
+    assert in_quiet_hours(time(5, 59), time(23), time(6))
+    assert not in_quiet_hours(time(6), time(23), time(6))
+    assert not in_quiet_hours(time(12), time(23), time(6))
+    assert not in_quiet_hours(time(12), None, None)
+
+
+def test_interval_from_now() -> None:
+    """Test refreshes one interval from now without alignment."""
+    assert next_refresh(local(2026, 10, 16, 12, 7), timedelta(minutes=15)) == local(
+        2026, 10, 16, 12, 22
+    )
+
+
+def test_aligned_with_lead_time() -> None:
+    """Test aligned refreshes run the lead time before the tick."""
+    assert next_refresh(
+        local(2026, 10, 16, 12, 7),
+        timedelta(minutes=15),
+        aligned=True,
+        lead_time=timedelta(seconds=30),
+    ) == local(2026, 10, 16, 12, 14, 30)
+
+
+def test_unaligned_refresh_skips_quiet_hours() -> None:
+    """Test a refresh in the quiet hours moves to their end."""
+    assert next_refresh(
+        local(2026, 10, 16, 22, 50), timedelta(minutes=60), **QUIET
+    ) == local(2026, 10, 17, 6)
+
+
+def test_aligned_tick_in_quiet_hours() -> None:
+    """Test an aligned tick in the quiet hours moves to the first tick after them."""
+    assert next_refresh(
+        local(2026, 10, 16, 22, 50), timedelta(minutes=90), aligned=True, **QUIET
+    ) == local(2026, 10, 17, 6)
+    assert next_refresh(
+        local(2026, 10, 16, 22, 50), timedelta(minutes=240), aligned=True, **QUIET
+    ) == local(2026, 10, 17, 8)
+
+
+def test_daily_tick_in_quiet_hours() -> None:
+    """Test a daily tick at midnight runs at the end of the quiet hours."""
+    assert next_refresh(
+        local(2026, 10, 16, 12), timedelta(minutes=1440), aligned=True, **QUIET
+    ) == local(2026, 10, 17, 6)
+
+
+def test_lead_time_waits_for_quiet_end() -> None:
+    """Test the first refresh after the quiet hours does not start in them."""
+    assert next_refresh(
+        local(2026, 10, 16, 5, 50),
+        timedelta(minutes=60),
+        aligned=True,
+        lead_time=timedelta(seconds=60),
+        **QUIET,
+    ) == local(2026, 10, 16, 6)
+
+
+def test_dst_fall_back_keeps_the_repeated_hour() -> None:
+    """Test aligned ticks continue hourly through the repeated hour."""
+    now = local(2026, 10, 25, 0, 30)
+    ticks = []
+    for _ in range(4):
+        now = next_refresh(now, timedelta(minutes=60), aligned=True)
+        ticks.append(dt_util.as_utc(now))
+
+    assert ticks == [
+        datetime(2026, 10, 24, 23, tzinfo=dt_util.UTC),
+        datetime(2026, 10, 25, 0, tzinfo=dt_util.UTC),
+        datetime(2026, 10, 25, 1, tzinfo=dt_util.UTC),
+        datetime(2026, 10, 25, 2, tzinfo=dt_util.UTC),
+    ]
+
+
+def test_dst_spring_forward_skips_the_missing_hour() -> None:
+    """Test aligned ticks stay on the hour when an hour is skipped."""
+    assert dt_util.as_local(
+        next_refresh(local(2026, 3, 29, 1, 30), timedelta(minutes=60), aligned=True)
+    ) == local(2026, 3, 29, 3)
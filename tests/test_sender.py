@@ -0,0 +1,78 @@
+"""Tests for the TRMNL sender."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.trmnl_webhook.sender import (
+    FAILURE_THRESHOLD,
+    MAX_RESET_TIMEOUT,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    _parse_retry_after,
+)
+
+
+def test_parse_retry_after() -> None:
+    """Test Retry-After in seconds, as a date and invalid values."""
+    assert _parse_retry_after("120") == 120
+    assert _parse_retry_after("-5") == 0
+    assert _parse_retry_after("inf") is None
+    assert _parse_retry_after("nan") is None
+    assert _parse_retry_after("1e300") == MAX_RESET_TIMEOUT
+    assert _parse_retry_after("Fri, 31 Dec 9999 23:59:59 GMT") == MAX_RESET_TIMEOUT
+    assert _parse_retry_after("soon") is None
+    assert _parse_retry_after(None) is None
+
+
+def test_breaker_opens_after_failures() -> None:
+    """Test the circuit opens after FAILURE_THRESHOLD failures."""
+    breaker = CircuitBreaker()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_allows_one_probe() -> None:
+    """Test a half-open circuit lets a single probe through."""
+    breaker = CircuitBreaker()
+    breaker.open_until = dt_util.utcnow() - timedelta(seconds=1)
+    assert breaker.state == STATE_HALF_OPEN
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_failed_probe_opens_the_circuit() -> None:
+    """Test a failed probe opens the circuit again."""
+    breaker = CircuitBreaker()
+    breaker.open_until = dt_util.utcnow() - timedelta(seconds=1)
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+    breaker.open_until = dt_util.utcnow() - timedelta(seconds=1)
+    assert breaker.allow_request()
+
+
+def test_cancelled_probe_frees_the_circuit() -> None:
+    """Test ending a probe lets the next send probe."""
+    breaker = CircuitBreaker()
+    breaker.open_until = dt_util.utcnow() - timedelta(seconds=1)
+    assert breaker.allow_request()
+
+    breaker.end_probe()
+    assert breaker.allow_request()